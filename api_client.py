@@ -0,0 +1,118 @@
+"""
+Client HTTP untuk batch API (127.0.0.1:8000).
+
+Satu requests.Session keep-alive dipakai bersama oleh START/STOP worker dan
+live uploader, jadi koneksi TCP tidak dibuka ulang di setiap request.
+Latency dicatat per endpoint (path template, mis. /batch/{id}/finish/items)
+untuk dicetak saat STOP. Request yang bisa di-retry membawa header
+Idempotency-Key supaya backend bisa mengabaikan duplikat.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from latency import latency_samples, percentile
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8000"
+DEFAULT_TIMEOUT = 10
+CONNECT_TIMEOUT = 3
+# START/STOP worker + live uploader; lebih dari cukup untuk satu backend
+POOL_SIZE = 4
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+class EndpointStats:
+    """Latency satu endpoint; hanya LATENCY_SAMPLES sample terakhir yang disimpan"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.samples = latency_samples()
+
+    def record(self, elapsed, ok):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.samples.append(elapsed)
+
+    def percentile(self, p):
+        return percentile(self.samples, p)
+
+    def summary(self):
+        mean = sum(self.samples) / len(self.samples) if self.samples else 0.0
+        return (
+            f"{self.count} calls, {self.errors} errors | mean {mean * 1000:.1f} ms, "
+            f"p50 {self.percentile(0.5) * 1000:.1f} ms, p95 {self.percentile(0.95) * 1000:.1f} ms, "
+            f"max {max(self.samples, default=0.0) * 1000:.1f} ms"
+        )
+
+
+class BatchApiClient:
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=DEFAULT_TIMEOUT,
+                 connect_timeout=CONNECT_TIMEOUT, pool_size=POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+
+    def request(self, method, path, endpoint=None, timeout=None, idempotency_key=None, **kwargs):
+        """
+        Request ke base_url + path lewat session yang di-pool.
+        endpoint = nama untuk metrics (default path), timeout = read timeout.
+        """
+        url = self.base_url + path
+        if idempotency_key:
+            kwargs["headers"] = {**kwargs.get("headers", {}), IDEMPOTENCY_HEADER: idempotency_key}
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.request(
+                method, url, timeout=(self.connect_timeout, timeout or self.timeout), **kwargs
+            )
+            ok = response.status_code < 500
+            return response
+        finally:
+            self._record(endpoint or path, time.perf_counter() - start, ok)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def _record(self, endpoint, elapsed, ok):
+        with self._stats_lock:
+            stats = self.stats.get(endpoint)
+            if stats is None:
+                stats = self.stats[endpoint] = EndpointStats()
+            stats.record(elapsed, ok)
+
+    def latency_summary(self):
+        with self._stats_lock:
+            return "\n".join(f"{endpoint}: {stats.summary()}" for endpoint, stats in self.stats.items())
+
+    def close(self):
+        self.session.close()
+
+    # ---------- batch API ----------
+
+    def start_batch(self, payload, **kwargs):
+        return self.post("/batch/start", json=payload, **kwargs)
+
+    def finish_batch(self, batch_record_id, **kwargs):
+        return self.post(f"/batch/{batch_record_id}/finish", endpoint="/batch/{id}/finish", **kwargs)
+
+    def post_finish_items(self, batch_record_id, **kwargs):
+        return self.post(
+            f"/batch/{batch_record_id}/finish/items", endpoint="/batch/{id}/finish/items", **kwargs
+        )
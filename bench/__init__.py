@@ -0,0 +1,5 @@
+"""
+Benchmark, dijalankan dari root repo sebagai modul, mis.
+
+    python -m bench.scanner_db [rows ...]
+"""
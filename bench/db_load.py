@@ -0,0 +1,71 @@
+"""
+Benchmark load scanner-db.json: json.load + normalisasi (lama) vs streaming loader.
+
+Setiap mode dijalankan di subprocess terpisah supaya peak RSS tidak tercampur.
+
+Usage:
+    python -m bench.db_load [rows ...]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bench.fixtures import peak_rss_kb, run_child, write_db_file
+from scanner_db import ScannerDatabase
+
+DEFAULT_SIZES = (1_000_000, 3_000_000)
+MODES = ("json.load", "stream")
+
+
+def load_legacy(path):
+    """Loader lama: json.load lalu list normalisasi kedua"""
+    with open(path, "r", encoding="utf-8") as f:
+        raw_data = json.load(f)
+
+    normalized = []
+    for row in raw_data:
+        normalized.append({
+            "SCANER 1": row.get("Scanner 1"),
+            "SCANER 2": row.get("Scanner 2"),
+            "SCANER 3": row.get("Scanner 3"),
+        })
+    return normalized
+
+
+def child_main(mode, path):
+    start = time.perf_counter()
+    if mode == "json.load":
+        db = load_legacy(path)
+    else:
+        db = ScannerDatabase.load(path)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"rows": len(db), "seconds": elapsed, "peak_rss_kb": peak_rss_kb()}))
+
+
+def run(n):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scanner-db.json")
+        write_db_file(path, n)
+        size_mb = os.path.getsize(path) / 1e6
+
+        print(f"{n:,} rows ({size_mb:.0f} MB)")
+        for mode in MODES:
+            r = run_child(__spec__.name, mode, path)
+            print(f"  {mode:<10} load {r['seconds']:7.2f}s | peak RSS {r['peak_rss_kb'] / 1024:8.1f} MB")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        child_main(sys.argv[2], sys.argv[3])
+        return
+
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+    for n in sizes:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
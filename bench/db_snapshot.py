@@ -0,0 +1,81 @@
+"""
+Benchmark startup-to-ready: load scanner-db.json vs mmap snapshot biner.
+
+Setiap mode dijalankan di subprocess terpisah (termasuk import) supaya
+waktu startup dan peak RSS tidak tercampur.
+
+Usage:
+    python -m bench.db_snapshot [rows ...]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bench.fixtures import peak_rss_kb, run_child, write_db_file
+
+DEFAULT_SIZES = (100_000, 1_000_000)
+MODES = ("json", "snapshot")
+LOOKUPS = 100_000
+
+
+def child_main(mode, path):
+    start = time.perf_counter()
+    if mode == "compile":
+        from db_snapshot import compile_snapshot
+        compile_snapshot(path)
+        print(json.dumps({"seconds": time.perf_counter() - start}))
+        return
+
+    if mode == "json":
+        from scanner_db import ScannerDatabase
+        db = ScannerDatabase.load(path)
+    else:
+        from db_snapshot import SnapshotDatabase
+        db = SnapshotDatabase.load(path)
+    ready = time.perf_counter() - start
+
+    codes = [f"BCA{i:013d}" for i in range(0, LOOKUPS * 2, 2)]
+    start = time.perf_counter()
+    for code in codes:
+        db.contains("SCANER 1", code)
+    lookup = (time.perf_counter() - start) / len(codes)
+
+    print(json.dumps({"ready": ready, "lookup": lookup, "peak_rss_kb": peak_rss_kb()}))
+
+
+def child(mode, path):
+    return run_child(__spec__.name, mode, path)
+
+
+def run(n):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scanner-db.json")
+        write_db_file(path, n)
+
+        # Compile juga di subprocess, ru_maxrss parent ikut terbawa ke child
+        compile_time = child("compile", path)["seconds"]
+        snap = os.path.join(tmp, "scanner-db.snapshot")
+
+        print(f"{n:,} rows | JSON {os.path.getsize(path) / 1e6:.0f} MB | "
+              f"snapshot {os.path.getsize(snap) / 1e6:.0f} MB | compile {compile_time:.2f}s")
+        for mode in MODES:
+            r = child(mode, path)
+            print(f"  {mode:<9} ready {r['ready'] * 1e3:9.1f} ms | lookup {r['lookup'] * 1e6:6.2f} us"
+                  f" | peak RSS {r['peak_rss_kb'] / 1024:7.1f} MB")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        child_main(sys.argv[2], sys.argv[3])
+        return
+
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+    for n in sizes:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Fixture bersama untuk benchmark di bench/: isi scanner-db.json palsu dan
+helper subprocess (satu mode per proses supaya peak RSS tidak tercampur).
+"""
+
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+
+# Root repo: benchmark dijalankan sebagai modul (python -m bench.<nama>) dari sini
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def raw_row(i, rnd):
+    """Satu baris scanner-db.json ("Scanner n"), kode scanner 1/2 unik per i"""
+    return {
+        "Scanner 1": f"BCA{i:013d}",
+        "Scanner 2": f"BCA1{i:020d}",
+        "Scanner 3": f"{rnd.randrange(10**10):010d}",
+    }
+
+
+def make_raw_rows(n, seed=42):
+    rnd = random.Random(seed)
+    return [raw_row(i, rnd) for i in range(n)]
+
+
+def write_db_file(path, n, seed=42):
+    rnd = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(n):
+            f.write("  " + json.dumps(raw_row(i, rnd)))
+            f.write(",\n" if i < n - 1 else "\n")
+        f.write("]\n")
+
+
+def peak_rss_kb():
+    # ru_maxrss: KB di Linux, byte di macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+def run_child(module, *args):
+    """Jalankan `python -m module --child args...`, return JSON dari stdout-nya"""
+    out = subprocess.run(
+        [sys.executable, "-m", module, "--child", *args],
+        check=True, capture_output=True, text=True, cwd=ROOT,
+    ).stdout
+    return json.loads(out)
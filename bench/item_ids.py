@@ -0,0 +1,100 @@
+"""
+Benchmark item ID: int(time.time() * 1000) % 100000 (lama) vs ItemIdSequence.
+
+1. Tabrakan ID dalam satu batch untuk beberapa kecepatan scan. Jam ditiru
+   (waktu item ke-i = i / rate + jitter kecil), jadi hasilnya sama dengan
+   shift nyata tanpa harus menunggu.
+2. Crash recovery: item di-append ke SessionJournal dan SqliteSessionStore,
+   store ditinggal tanpa finish (seperti crash), di-recover, lalu lanjut
+   append dengan ItemIdSequence(store.last_item_id). Semua ID harus unik.
+3. Lewat 100.000 item (batas 5 digit lama): ID tetap unik, dan wrap baru
+   terjadi setelah ITEM_ID_LIMIT - 1 (uint32).
+4. Biaya next() per item.
+
+Usage:
+    python -m bench.item_ids [items_per_batch]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from session_journal import SessionJournal
+from session_records import ITEM_ID_LIMIT, ItemIdSequence, ItemRecord, ScanResult
+from session_store import SqliteSessionStore
+
+# Lebih dari 100.000 supaya wrap 5 digit lama ikut teruji
+DEFAULT_ITEMS = 150_000
+SCAN_RATES = (1, 5, 20, 100, 1000)
+JITTER = 0.0005
+
+
+def legacy_ids(n, rate, rng):
+    start = 1_700_000_000.0
+    return [int((start + i / rate + rng.uniform(0, JITTER)) * 1000) % 100000 for i in range(n)]
+
+
+def sequence_ids(n):
+    seq = ItemIdSequence()
+    return [seq.next() for _ in range(n)]
+
+
+def collisions(ids):
+    return len(ids) - len(set(ids))
+
+
+def recovery(store_class, path, n):
+    store = store_class(path)
+    store.start(12345, "2026-01-01T00:00:00")
+    seq = ItemIdSequence()
+    ids = []
+    for _ in range(n // 2):
+        item = ItemRecord(seq.next(), "2026-01-01T00:00:00", scanner_1=ScanResult("1000000000001", True),
+                          validation_result="PASS")
+        store.append(item)
+        ids.append(item.item_id)
+    store.sync()
+    # "Crash": tidak ada finish / STOP; store lama dibiarkan
+    store.close()
+
+    recovered = store_class.recover(path)
+    seq = ItemIdSequence(recovered.last_item_id)
+    for _ in range(n - n // 2):
+        item = ItemRecord(seq.next(), "2026-01-01T00:00:00", validation_result="PASS")
+        recovered.append(item)
+        ids.append(item.item_id)
+    recovered.close()
+    return ids, recovered.last_item_id
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITEMS
+    rng = random.Random(1)
+    print(f"Collisions in one batch of {n:,} items:")
+    for rate in SCAN_RATES:
+        old = collisions(legacy_ids(n, rate, rng))
+        new = collisions(sequence_ids(n))
+        print(f"  {rate:5d} items/s | time%100000 {old:6,} colliding ids | ItemIdSequence {new}")
+
+    print("Crash recovery (half the batch before crash, half after):")
+    with tempfile.TemporaryDirectory() as tmp:
+        for store_class, name in ((SessionJournal, "journal.jsonl"), (SqliteSessionStore, "session.db")):
+            ids, last = recovery(store_class, os.path.join(tmp, name), n)
+            print(f"  {store_class.__name__:<18} {len(ids):,} ids, {collisions(ids)} duplicates, last id {last}")
+
+    # Dekat batas uint32: ID terakhir ITEM_ID_LIMIT - 1, berikutnya kembali ke 1
+    seq = ItemIdSequence(ITEM_ID_LIMIT - 3)
+    tail = [seq.next() for _ in range(4)]
+    print(f"Wrap at ITEM_ID_LIMIT - 1 ({ITEM_ID_LIMIT - 1:,}): {tail}")
+
+    seq = ItemIdSequence()
+    start = time.perf_counter()
+    for _ in range(1_000_000):
+        seq.next()
+    print(f"ItemIdSequence.next(): {(time.perf_counter() - start) * 1000:.0f} ns/item")
+
+
+if __name__ == "__main__":
+    main()
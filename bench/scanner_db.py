@@ -0,0 +1,70 @@
+"""
+Micro-benchmark validasi per-scanner: linear scan (lama) vs index per kolom.
+
+Usage:
+    python -m bench.scanner_db [rows ...]
+"""
+
+import random
+import sys
+import time
+
+from bench.fixtures import make_raw_rows
+from scanner_db import ScannerDatabase, normalize_row
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+
+def linear_validate(entries, scanner_key, scanner_value):
+    """Implementasi lama App._validate_individual_scanner"""
+    for entry in entries:
+        if entry.get(scanner_key) == scanner_value:
+            return True
+    return False
+
+
+def time_per_call(fn, codes):
+    start = time.perf_counter()
+    for code in codes:
+        fn("SCANER 1", code)
+    return (time.perf_counter() - start) / len(codes)
+
+
+def fmt(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:9.3f} ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:9.3f} us"
+    return f"{seconds * 1e9:9.1f} ns"
+
+
+def run(n):
+    raw = make_raw_rows(n)
+    entries = [normalize_row(r) for r in raw]
+    db = ScannerDatabase(entries)
+
+    # Worst case lama = miss (scan seluruh list), campur hit dan miss
+    rnd = random.Random(n)
+    linear_samples = max(5, 200_000 // n)
+    index_samples = 100_000
+    hits = [entries[rnd.randrange(n)]["SCANER 1"] for _ in range(index_samples // 2)]
+    misses = [f"XXX{i:013d}" for i in range(index_samples // 2)]
+    codes = hits + misses
+    rnd.shuffle(codes)
+
+    before_hit = time_per_call(lambda k, v: linear_validate(entries, k, v), hits[:linear_samples])
+    before_miss = time_per_call(lambda k, v: linear_validate(entries, k, v), misses[:linear_samples])
+    after = time_per_call(db.contains, codes)
+
+    print(f"{n:>10,} rows | before hit {fmt(before_hit)} | before miss {fmt(before_miss)} | after {fmt(after)}")
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+    print("Per-item validation latency (SCANER 1)")
+    for n in sizes:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark protokol link Arduino: teks vs frame biner, loopback lewat pty.
+
+1. Ukuran per envelope (SCAN1 + SCAN2 + SCAN3) dan waktu di kabel untuk
+   beberapa baud rate (8N1 = 10 bit per byte).
+2. Loopback: perintah di-encode, ditulis ke sisi master pty, dibaca dari sisi
+   slave oleh SerialReader + decoder protokol; semua baris harus kembali sama.
+3. Sama seperti (2) tapi 1% frame dirusak (1 byte di-flip): frame rusak harus
+   ditolak CRC dan frame berikutnya tetap terbaca.
+
+pty tidak membatasi kecepatan seperti UART, jadi (2) mengukur biaya CPU
+encode + decode, bukan waktu di kabel.
+
+Usage:
+    python -m bench.serial_protocol [envelopes]
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+import tty
+
+import serial
+
+from serial_engine import SerialReader
+from serial_protocol import BinaryProtocol, TextProtocol
+
+DEFAULT_ENVELOPES = 5000
+BAUD_RATES = (9600, 115200, 250000)
+BITS_PER_BYTE = 10
+CORRUPT_RATE = 0.01
+
+
+def envelope(i):
+    item_id = i % 100000
+    return [
+        f"SCAN1:{item_id}:{1000000000000 + i:013d}",
+        f"SCAN2:{item_id}:BCA1{i:020d}",
+        f"SCAN3:{item_id}:{i % 10**10:010d}",
+    ]
+
+
+def wire_table(protocols):
+    cmds = envelope(12345)
+    print("Per envelope (3 x SCAN):")
+    for protocol in protocols:
+        size = sum(len(protocol.encode(c)) for c in cmds)
+        times = " | ".join(
+            f"{baud:>6} baud {size * BITS_PER_BYTE / baud * 1000:6.2f} ms" for baud in BAUD_RATES
+        )
+        print(f"  {protocol.name:<7} {size:3d} bytes | {times}")
+
+
+def loopback(protocol, n, corrupt=False):
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    port = serial.Serial(os.ttyname(slave), 115200)
+
+    expected = [cmd for i in range(n) for cmd in envelope(i)]
+    received = []
+    last = [0.0]
+    done = threading.Event()
+
+    def handler(line):
+        received.append(line)
+        last[0] = time.perf_counter()
+        if len(received) >= len(expected):
+            done.set()
+
+    decoder = protocol.decoder()
+    # Tanpa Tk: callback langsung dijalankan di thread reader
+    reader = SerialReader(port, handler, lambda callback: callback(), framer=decoder)
+    reader.start()
+
+    rng = random.Random(1)
+    corrupted = 0
+    start = time.perf_counter()
+    encoded = []
+    for cmd in expected:
+        frame = bytearray(protocol.encode(cmd))
+        if corrupt and rng.random() < CORRUPT_RATE:
+            frame[rng.randrange(1, len(frame))] ^= 0x5A
+            corrupted += 1
+        encoded.append(bytes(frame))
+    encode_time = time.perf_counter() - start
+
+    data = b"".join(encoded)
+    for offset in range(0, len(data), 4096):
+        os.write(master, data[offset:offset + 4096])
+    # Dengan frame rusak tidak semua baris sampai; tunggu sampai stream diam
+    done.wait(timeout=1 if corrupt else 30)
+    elapsed = last[0] - start
+
+    reader.stop()
+    port.close()
+    os.close(master)
+
+    expected_set = set(expected)
+    intact = sum(1 for line in received if line in expected_set)
+    label = f"{protocol.name}{' +corrupt' if corrupt else ''}"
+    crc = getattr(decoder, "crc_errors", "-")
+    print(f"  {label:<16} {len(expected):,} cmds, {len(data):,} bytes | encode {encode_time / len(expected) * 1e6:5.2f} us/cmd"
+          f" | loopback {len(expected) / elapsed:9,.0f} cmds/s | received {len(received):,}, intact {intact:,}"
+          f" | corrupted {corrupted}, crc rejects {crc}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ENVELOPES
+    protocols = (TextProtocol(), BinaryProtocol())
+    wire_table(protocols)
+
+    print(f"Loopback over pty, {n:,} envelopes:")
+    for protocol in protocols:
+        loopback(protocol, n)
+    loopback(BinaryProtocol(), n, corrupt=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Perbandingan memory session_data: dict bertingkat (lama) vs record __slots__.
+
+Usage:
+    python -m bench.session_records [items ...]
+"""
+
+import json
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+from session_records import ItemRecord, ScanResult
+
+DEFAULT_SIZES = (100_000,)
+
+
+def make_dict_item(i, ts):
+    """Bentuk item lama dari _start_item_if_needed + _process_buffer"""
+    item = {
+        "item_id": i,
+        "timestamp": ts,
+        "scanner_1": None,
+        "scanner_2": None,
+        "scanner_3": None,
+    }
+    item["scanner_1"] = {"value": f"BCA{i:013d}", "valid": True}
+    item["scanner_2"] = {"value": f"BCA1{i:020d}", "valid": True}
+    item["validation_result"] = "PASS"
+    return item
+
+
+def make_record_item(i, ts):
+    item = ItemRecord(i, ts)
+    item.scanner_1 = ScanResult(f"BCA{i:013d}", True)
+    item.scanner_2 = ScanResult(f"BCA1{i:020d}", True)
+    item.validation_result = "PASS"
+    return item
+
+
+def legacy_finish_entry(item):
+    """Implementasi lama loop finish_data di stop_system"""
+    entry = {"item_id": item.get("item_id")}
+    for key in ("scanner_1", "scanner_2", "scanner_3"):
+        if key in item:
+            entry[key] = item[key]
+    res = item.get("validation_result")
+    if isinstance(res, str):
+        res = res.strip().capitalize()
+    entry["result"] = res or "Unknown"
+    return entry
+
+
+def measure(factory, n, timestamps):
+    tracemalloc.start()
+    items = [factory(i, timestamps[i]) for i in range(n)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return items, size
+
+
+def run(n):
+    # String value/timestamp dibuat dulu supaya yang diukur hanya struktur item
+    base = datetime(2026, 1, 1)
+    timestamps = [(base + timedelta(seconds=i)).isoformat() for i in range(n)]
+
+    dict_items, dict_size = measure(make_dict_item, n, timestamps)
+    record_items, record_size = measure(make_record_item, n, timestamps)
+
+    same = (
+        json.dumps([legacy_finish_entry(item) for item in dict_items])
+        == json.dumps([item.to_finish_entry() for item in record_items])
+    )
+
+    print(f"{n:,} items")
+    print(f"  dict    {dict_size / 1e6:8.2f} MB ({dict_size / n:6.0f} B/item)")
+    print(f"  slots   {record_size / 1e6:8.2f} MB ({record_size / n:6.0f} B/item)")
+    print(f"  finish payload identical: {same}")
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+    for n in sizes:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
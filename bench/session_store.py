@@ -0,0 +1,67 @@
+"""
+Benchmark session store: throughput tulis dan latency append() di caller.
+
+append() dipanggil dari Tk thread di aplikasi, jadi yang penting latency
+per call (harus tidak pernah menunggu disk) dan throughput commit writer
+harus jauh di atas laju scanner.
+
+Usage:
+    python -m bench.session_store [items ...]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from session_journal import SessionJournal
+from session_records import ItemRecord, ScanResult
+from session_store import SqliteSessionStore
+
+DEFAULT_SIZES = (100_000,)
+STORES = (("sqlite", SqliteSessionStore, "session.sqlite3"), ("journal", SessionJournal, "session.journal"))
+
+
+def make_item(i):
+    item = ItemRecord(i, "2026-01-01T00:00:00", validation_result="PASS" if i % 5 else "FAIL")
+    item.scanner_1 = ScanResult(f"BCA{i:013d}", True)
+    item.scanner_2 = ScanResult(f"BCA1{i:020d}", bool(i % 5))
+    return item
+
+
+def run(n):
+    items = [make_item(i) for i in range(n)]
+    print(f"{n:,} items")
+
+    for label, cls, filename in STORES:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = cls(os.path.join(tmp, filename))
+            store.start(1, "2026-01-01T00:00:00")
+
+            latencies = []
+            start = time.perf_counter()
+            for item in items:
+                t = time.perf_counter()
+                store.append(item)
+                latencies.append(time.perf_counter() - t)
+            store.sync()
+            elapsed = time.perf_counter() - start
+
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99)]
+            counts = store.result_counts()
+            store.close()
+
+            print(f"  {label:<8} {n / elapsed:10,.0f} items/s sustained | append mean "
+                  f"{statistics.fmean(latencies) * 1e6:6.2f} us, p99 {p99 * 1e6:6.2f} us | {counts}")
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+    for n in sizes:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
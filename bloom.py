@@ -0,0 +1,104 @@
+"""
+Bloom filter sebagai prefilter lookup kode scanner.
+
+Dipakai di depan index DB supaya kode yang pasti tidak ada (batch yang
+banyak FAIL) langsung dijawab "tidak" tanpa lookup penuh. Hash pakai
+zlib.crc32 + zlib.adler32 (double hashing): cepat karena di C dan
+deterministik, jadi bit-nya bisa disimpan di snapshot biner.
+"""
+
+import math
+import zlib
+
+DEFAULT_FP_RATE = 0.01
+
+
+def optimal_size(capacity, fp_rate):
+    """Return (jumlah bit, jumlah hash) untuk kapasitas + false-positive rate"""
+    capacity = max(1, capacity)
+    num_bits = math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+    num_bits = max(64, (num_bits + 7) // 8 * 8)
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+class BloomFilter:
+    def __init__(self, num_bits, num_hashes, bits=None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        # bits bisa bytearray (in-memory) atau memoryview read-only dari mmap
+        self.bits = bits if bits is not None else bytearray(num_bits // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, fp_rate=DEFAULT_FP_RATE):
+        return cls(*optimal_size(capacity, fp_rate))
+
+    def add_bytes(self, data: bytes):
+        h1 = zlib.crc32(data)
+        h2 = zlib.adler32(data) | 1
+        bits = self.bits
+        m = self.num_bits
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % m
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def add(self, value: str):
+        self.add_bytes(value.encode("utf-8"))
+
+    def __contains__(self, value) -> bool:
+        """False = pasti tidak ada, True = mungkin ada"""
+        data = value.encode("utf-8")
+        h1 = zlib.crc32(data)
+        h2 = zlib.adler32(data) | 1
+        bits = self.bits
+        m = self.num_bits
+        # Inline (tanpa generator): ini hot path untuk setiap kode FAIL
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % m
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @property
+    def size_bytes(self):
+        return self.num_bits // 8
+
+
+class PrefilterStats:
+    """
+    Statistik prefilter per kolom scanner untuk tuning false-positive rate.
+
+    rejected       : dijawab "pasti tidak ada" oleh Bloom filter
+    hits           : lolos filter dan memang ada di DB
+    false_positive : lolos filter tapi ternyata tidak ada di DB
+    """
+
+    def __init__(self, keys):
+        self.counts = {key: {"rejected": 0, "hits": 0, "false_positive": 0} for key in keys}
+
+    def record(self, key, passed, found=False):
+        counts = self.counts[key]
+        if not passed:
+            counts["rejected"] += 1
+        elif found:
+            counts["hits"] += 1
+        else:
+            counts["false_positive"] += 1
+
+    def observed_fp_rate(self, key):
+        """Fraksi kode yang tidak ada di DB tapi lolos filter"""
+        counts = self.counts[key]
+        misses = counts["rejected"] + counts["false_positive"]
+        return counts["false_positive"] / misses if misses else 0.0
+
+    def summary(self):
+        lines = []
+        for key, counts in self.counts.items():
+            total = sum(counts.values())
+            if not total:
+                continue
+            lines.append(
+                f"{key}: {total} lookups | rejected {counts['rejected']} | hits {counts['hits']} | "
+                f"false positive {counts['false_positive']} ({self.observed_fp_rate(key):.2%})"
+            )
+        return "\n".join(lines)
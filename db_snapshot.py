@@ -0,0 +1,350 @@
+"""
+Binary snapshot scanner-db.json untuk startup cepat.
+
+compile_snapshot() mengubah JSON menjadi satu file biner berisi array
+fixed-width yang sudah diurutkan per kolom scanner ("SCANER 1/2/3"):
+
+    header  : magic, mtime_ns + size + sha256 file JSON sumber, jumlah baris
+    kolom n : width, count, offset
+    record  : value (utf-8, dipad NUL sampai width) + uint32 jumlah baris
+    rows    : (s1 | s2 | s3) fixed-width, urut per s1, untuk cek per baris
+              (baris tanpa s1 juga disimpan, s1 kosong, untuk remove_raw)
+    bloom n : bit Bloom filter per kolom (num_hashes, num_bits, offset)
+
+SnapshotDatabase mmap file tersebut dan lookup pakai binary search langsung
+di mmap, tanpa deserialisasi. Delta sidecar tetap bisa diterapkan sebagai
+overlay di memory.
+"""
+
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+from collections import Counter
+
+from bloom import DEFAULT_FP_RATE, BloomFilter, PrefilterStats
+from scanner_db import ROW_KEY, SCANNER_KEYS, SOURCE_KEYS, DeltaMixin, iter_json_array
+
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_MAGIC = b"BCADBSN4"
+
+_HEADER = struct.Struct("<8sQQ32sQ")
+_COLUMN = struct.Struct("<IQQ")
+_COUNT = struct.Struct("<I")
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def snapshot_path(db_path):
+    """~/scanner-db.json -> ~/scanner-db.snapshot"""
+    return os.path.splitext(db_path)[0] + SNAPSHOT_SUFFIX
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def compile_snapshot(json_path, snap_path=None, fp_rate=DEFAULT_FP_RATE):
+    """Compile scanner-db.json ke snapshot biner (ditulis atomic via rename)"""
+    snap_path = snap_path or snapshot_path(json_path)
+    st = os.stat(json_path)
+    digest = file_digest(json_path)
+
+    counters = {key: Counter() for key in SCANNER_KEYS}
+    table = []
+    rows = 0
+    with open(json_path, "r", encoding="utf-8") as f:
+        for row in iter_json_array(f):
+            rows += 1
+            encoded = []
+            for key, src in SOURCE_KEYS.items():
+                value = row.get(src)
+                # Hanya string yang bisa cocok dengan hasil scan
+                if value and isinstance(value, str):
+                    value = value.encode("utf-8")
+                    counters[key][value] += 1
+                    encoded.append(value)
+                else:
+                    encoded.append(b"")
+            table.append(tuple(encoded))
+    table.sort()
+
+    blooms = []
+    for key in SCANNER_KEYS:
+        bloom = BloomFilter.for_capacity(len(counters[key]), fp_rate)
+        for value in counters[key]:
+            bloom.add_bytes(value)
+        blooms.append(bloom)
+
+    tmp_path = snap_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        offset = _HEADER.size + _COLUMN.size * (2 * len(SCANNER_KEYS) + 1)
+        layout = []
+        for key in SCANNER_KEYS:
+            counter = counters[key]
+            width = max(map(len, counter), default=0)
+            layout.append((width, len(counter), offset))
+            offset += (width + _COUNT.size) * len(counter)
+
+        widths = [width for width, _, _ in layout]
+        rows_entry = (sum(widths), len(table), offset)
+        offset += sum(widths) * len(table)
+
+        bloom_layout = []
+        for bloom in blooms:
+            bloom_layout.append((bloom.num_hashes, bloom.num_bits, offset))
+            offset += bloom.size_bytes
+
+        out.write(_HEADER.pack(SNAPSHOT_MAGIC, st.st_mtime_ns, st.st_size, digest, rows))
+        for entry in layout:
+            out.write(_COLUMN.pack(*entry))
+        out.write(_COLUMN.pack(*rows_entry))
+        for entry in bloom_layout:
+            out.write(_COLUMN.pack(*entry))
+
+        for key, (width, _, _) in zip(SCANNER_KEYS, layout):
+            counter = counters[key]
+            for value in sorted(counter):
+                out.write(value.ljust(width, b"\0"))
+                out.write(_COUNT.pack(min(counter[value], 0xFFFFFFFF)))
+
+        for row in table:
+            out.write(b"".join(value.ljust(width, b"\0") for value, width in zip(row, widths)))
+
+        for bloom in blooms:
+            out.write(bloom.bits)
+
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(tmp_path, snap_path)
+    return snap_path
+
+
+def is_snapshot_fresh(json_path, snap_path=None) -> bool:
+    """
+    Snapshot valid kalau mtime + size JSON sama. Kalau hanya mtime yang
+    berubah (file di-touch / ditulis ulang dengan isi sama), cek sha256 dan
+    perbarui header supaya pengecekan berikutnya murah lagi.
+    """
+    snap_path = snap_path or snapshot_path(json_path)
+    try:
+        with open(snap_path, "rb") as f:
+            magic, mtime_ns, size, digest, rows = _HEADER.unpack(f.read(_HEADER.size))
+    except (OSError, struct.error):
+        return False
+
+    if magic != SNAPSHOT_MAGIC:
+        return False
+
+    st = os.stat(json_path)
+    if st.st_mtime_ns == mtime_ns and st.st_size == size:
+        return True
+
+    if st.st_size != size or file_digest(json_path) != digest:
+        return False
+
+    with open(snap_path, "r+b") as f:
+        f.write(_HEADER.pack(magic, st.st_mtime_ns, st.st_size, digest, rows))
+    return True
+
+
+def ensure_snapshot(json_path, snap_path=None):
+    """Rebuild snapshot kalau belum ada atau JSON sumber berubah"""
+    snap_path = snap_path or snapshot_path(json_path)
+    if not is_snapshot_fresh(json_path, snap_path):
+        compile_snapshot(json_path, snap_path)
+    return snap_path
+
+
+class _ColumnView:
+    """Sequence read-only atas satu kolom di mmap, untuk bisect"""
+
+    def __init__(self, mm, width, count, offset, record_size=None):
+        self.mm = mm
+        self.width = width
+        self.count = count
+        self.offset = offset
+        self.record_size = record_size or width + _COUNT.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        start = self.offset + i * self.record_size
+        return self.mm[start:start + self.width]
+
+    def row_count(self, value: bytes) -> int:
+        """Jumlah baris dengan value ini (0 kalau tidak ada)"""
+        if len(value) > self.width:
+            return 0
+        key = value.ljust(self.width, b"\0")
+        i = bisect.bisect_left(self, key)
+        if i == self.count or self[i] != key:
+            return 0
+        start = self.offset + i * self.record_size + self.width
+        return _COUNT.unpack_from(self.mm, start)[0]
+
+
+class SnapshotDatabase(DeltaMixin):
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, _, _, _, self.rows = _HEADER.unpack_from(self._mm, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a scanner DB snapshot: {path}")
+
+        self.columns = {}
+        for i, key in enumerate(SCANNER_KEYS):
+            width, count, offset = _COLUMN.unpack_from(self._mm, _HEADER.size + i * _COLUMN.size)
+            self.columns[key] = _ColumnView(self._mm, width, count, offset)
+
+        # Tabel baris urut per kode scanner 1, key bisect = kolom s1
+        self.widths = [self.columns[key].width for key in SCANNER_KEYS]
+        record_size, count, offset = _COLUMN.unpack_from(
+            self._mm, _HEADER.size + len(SCANNER_KEYS) * _COLUMN.size
+        )
+        self.rows_view = _ColumnView(self._mm, self.widths[0], count, offset, record_size)
+
+        # Bloom filter tersimpan di snapshot, aktif lewat enable_prefilter
+        self._blooms = {}
+        for i, key in enumerate(SCANNER_KEYS):
+            num_hashes, num_bits, offset = _COLUMN.unpack_from(
+                self._mm, _HEADER.size + (len(SCANNER_KEYS) + 1 + i) * _COLUMN.size
+            )
+            bits = memoryview(self._mm)[offset:offset + num_bits // 8]
+            self._blooms[key] = BloomFilter(num_bits, num_hashes, bits)
+        self.prefilters = None
+        self.prefilter_stats = None
+
+        # Overlay dari delta sidecar: value -> jumlah baris
+        self.added = {key: {} for key in SCANNER_KEYS}
+        self.removed = {key: {} for key in SCANNER_KEYS}
+        self.added_count = 0
+        self.removed_count = 0
+
+        # Overlay per baris: s1 -> list (s1, s2, s3), dan (s1, s2, s3) -> jumlah
+        self.added_rows = {}
+        self.removed_rows = {}
+
+    @classmethod
+    def load(cls, json_path):
+        """Open (dan rebuild kalau perlu) snapshot untuk scanner-db.json"""
+        return cls(ensure_snapshot(json_path))
+
+    def enable_prefilter(self, fp_rate=None):
+        """
+        Aktifkan Bloom filter dari snapshot. False-positive rate ditentukan
+        saat compile_snapshot, argumen fp_rate di sini diabaikan.
+        """
+        self.prefilters = self._blooms
+        self.prefilter_stats = PrefilterStats(SCANNER_KEYS)
+
+    def _count(self, key, value) -> int:
+        count = self.columns[key].row_count(value.encode("utf-8"))
+        return count + self.added[key].get(value, 0) - self.removed[key].get(value, 0)
+
+    def add_raw(self, row):
+        """Add a row in the scanner-db.json ("Scanner n") format"""
+        for key, src in SOURCE_KEYS.items():
+            value = row.get(src)
+            if value:
+                column = self.added[key]
+                column[value] = column.get(value, 0) + 1
+        self.added_count += 1
+
+        # Baris tanpa kode scanner 1 disimpan di key None (hanya untuk remove_raw)
+        values = tuple(row.get(SOURCE_KEYS[key]) or None for key in SCANNER_KEYS)
+        self.added_rows.setdefault(values[0], []).append(values)
+
+    def remove_raw(self, row) -> bool:
+        """
+        Remove a row in the scanner-db.json format. Return False kalau
+        baris tersebut tidak ada di DB.
+        """
+        full = tuple(row.get(SOURCE_KEYS[key]) or None for key in SCANNER_KEYS)
+        if not any(full) or not all(value is None or isinstance(value, str) for value in full):
+            return False
+
+        # Baris persis (s1, s2, s3) harus ada di snapshot / overlay dan belum
+        # di-remove semua; cek per value saja bisa menghapus baris yang tidak ada
+        copies = sum(1 for stored in self._snapshot_rows(full[0] or "") if stored == full)
+        copies += sum(1 for stored in self.added_rows.get(full[0], ()) if stored == full)
+        if copies <= self.removed_rows.get(full, 0):
+            return False
+
+        for key, value in zip(SCANNER_KEYS, full):
+            if value:
+                column = self.removed[key]
+                column[value] = column.get(value, 0) + 1
+        self.removed_count += 1
+
+        self.removed_rows[full] = self.removed_rows.get(full, 0) + 1
+        return True
+
+    def _snapshot_rows(self, anchor):
+        """Semua baris snapshot dengan kode scanner 1 = anchor"""
+        view = self.rows_view
+        key = anchor.encode("utf-8")
+        if len(key) > view.width:
+            return
+        key = key.ljust(view.width, b"\0")
+
+        i = bisect.bisect_left(view, key)
+        while i < view.count and view[i] == key:
+            start = view.offset + i * view.record_size
+            row = []
+            for width in self.widths:
+                value = self._mm[start:start + width].rstrip(b"\0")
+                row.append(value.decode("utf-8") or None)
+                start += width
+            yield tuple(row)
+            i += 1
+
+    def contains(self, scanner_key, value) -> bool:
+        """Check whether value exists in the given scanner column"""
+        if scanner_key not in self.columns or not isinstance(value, str):
+            return False
+
+        # Kode dari delta tidak ada di Bloom filter snapshot
+        if self.prefilters is None or value in self.added[scanner_key]:
+            return self._count(scanner_key, value) > 0
+
+        if value not in self.prefilters[scanner_key]:
+            self.prefilter_stats.record(scanner_key, False)
+            return False
+
+        found = self._count(scanner_key, value) > 0
+        self.prefilter_stats.record(scanner_key, True, found)
+        return found
+
+    def row_matches(self, values):
+        """
+        Check whether the given codes ({"SCANER n": code}) come from one DB row.
+        Kode None/kosong diabaikan. Return None kalau kode scanner 1 tidak ada.
+        """
+        anchor = values.get(ROW_KEY)
+        if not anchor:
+            return None
+        if not isinstance(anchor, str):
+            return False
+
+        wanted = [(i, values.get(key)) for i, key in enumerate(SCANNER_KEYS) if values.get(key)]
+
+        matched = {}
+        for rows in (self._snapshot_rows(anchor), self.added_rows.get(anchor, ())):
+            for row in rows:
+                if all(row[i] == value for i, value in wanted):
+                    matched[row] = matched.get(row, 0) + 1
+
+        # Baris yang sudah di-remove lewat delta tidak dihitung
+        return any(n > self.removed_rows.get(row, 0) for row, n in matched.items())
+
+    def __len__(self):
+        return self.rows + self.added_count - self.removed_count
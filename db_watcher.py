@@ -0,0 +1,148 @@
+"""
+Event-driven watcher untuk ~/scanner-db.json (Linux inotify via ctypes).
+
+Yang di-watch adalah direktori file, bukan file-nya, supaya pola
+"tulis ke file temp lalu rename" tetap terdeteksi. Event dikumpulkan dulu
+(debounce) sampai file tenang, baru callback dipanggil sekali. Thread
+watcher hanya blok di select(), jadi tidak ada CPU idle.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+DEFAULT_DEBOUNCE = 0.3
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    def __init__(self, path, callback, debounce=DEFAULT_DEBOUNCE):
+        self.path = os.path.abspath(path)
+        self.directory = os.path.dirname(self.path)
+        self.filename = os.fsencode(os.path.basename(self.path))
+        self.callback = callback
+        self.debounce = debounce
+
+        self._fd = None
+        self._wake_r = None
+        self._wake_w = None
+        self._thread = None
+
+    @staticmethod
+    def available() -> bool:
+        return _load_libc() is not None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Register inotify watch dan jalankan thread watcher"""
+        if self.running:
+            return
+
+        libc = _load_libc()
+        if libc is None:
+            raise OSError("inotify not available on this platform")
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        wd = libc.inotify_add_watch(fd, os.fsencode(self.directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, os.strerror(err), self.directory)
+
+        self._fd = fd
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+
+        os.write(self._wake_w, b"x")
+        self._thread.join(timeout=1)
+        self._thread = None
+
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+        self._fd = self._wake_r = self._wake_w = None
+
+    def _read_events(self):
+        """Return True kalau ada event untuk file yang di-watch"""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        matched = False
+        offset = 0
+        while offset < len(data):
+            _, _, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if name == self.filename:
+                matched = True
+        return matched
+
+    def _run(self):
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+
+            if self._wake_r in readable:
+                return
+
+            if self._fd in readable and self._read_events():
+                # Masih ada tulisan masuk -> tunggu sampai file tenang
+                deadline = time.monotonic() + self.debounce
+                continue
+
+            if deadline is not None and time.monotonic() >= deadline:
+                deadline = None
+                try:
+                    self.callback()
+                except Exception as e:
+                    print(f"❌ DB watcher callback error: {e}")
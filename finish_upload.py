@@ -0,0 +1,191 @@
+"""
+Upload hasil batch ke /batch/{id}/finish secara bertahap (per halaman).
+
+Sebelumnya seluruh batch dikirim dalam satu POST dengan timeout 10 detik;
+batch besar kena timeout dan laporan batch hilang semua. Sekarang:
+
+    POST /batch/{id}/finish/items   body: {"offset": n, "items": [...]}  (gzip)
+         -> 200 {"next_offset": m}  (opsional, default n + len(items))
+         -> 409 {"next_offset": m}  backend minta lanjut dari offset lain
+    ...
+    POST /batch/{id}/finish         body: {"total": N, "chunked": true}
+
+Setiap halaman yang sudah diterima dicatat di session store
+(mark_uploaded), jadi kalau koneksi putus / app restart upload lanjut dari
+offset terakhir, bukan dari awal. Memory dan waktu per request sebanding
+dengan PAGE_SIZE, bukan ukuran batch.
+
+Kalau backend belum punya endpoint /finish/items (404/405), fallback ke
+protokol lama: satu body JSON array yang di-stream dari session store.
+
+Idempotency-Key dibentuk dari batch + offset + jumlah item, jadi halaman
+yang dikirim ulang (retry, restart) selalu membawa key yang sama.
+"""
+
+import gzip
+from itertools import islice
+
+PAGE_SIZE = 1000
+PAGE_TIMEOUT = 10
+# Fallback satu body: timeout dihitung per item supaya batch besar tidak putus di 10 detik
+LEGACY_TIMEOUT = 10
+LEGACY_TIMEOUT_PER_1000 = 1.0
+
+
+class FinishUploadError(Exception):
+    pass
+
+
+class FinishUploadCancelled(FinishUploadError):
+    """cancel di-set (app ditutup) di antara halaman; progress tetap tersimpan"""
+
+
+def idempotency_key(batch_record_id, *parts):
+    return "-".join(str(p) for p in ("bca-batch", batch_record_id, *parts))
+
+
+class FinishUploader:
+    def __init__(self, client, store, page_size=PAGE_SIZE, timeout=PAGE_TIMEOUT, compress=True):
+        self.client = client
+        self.store = store
+        self.page_size = page_size
+        self.timeout = timeout
+        self.compress = compress
+
+        self.pages_sent = 0
+        self.bytes_sent = 0
+        self.legacy = False
+
+    def upload(self, cancel=None):
+        """
+        Kirim semua item yang belum diterima backend lalu tutup batch.
+        Return response finish; raise FinishUploadError kalau gagal
+        (progress yang sudah diterima tetap tersimpan).
+        """
+        # Progress dari sesi sebelumnya (crash / STOP gagal), bukan dari live upload
+        if self.store.uploaded and not self.pages_sent:
+            print(f"↻ Resume finish upload from item {self.store.uploaded}/{self.store.count}")
+
+        self.upload_pending(cancel)
+        self._check_cancel(cancel)
+        if self.legacy:
+            return self._upload_legacy()
+        return self.finish()
+
+    def upload_pending(self, cancel=None):
+        """
+        Kirim item yang sudah di-commit tapi belum diterima backend (per halaman).
+        Return jumlah item yang terkirim. Kalau backend tidak punya endpoint
+        halaman, set self.legacy dan tidak mengirim apa-apa.
+
+        cancel: threading.Event, dicek sebelum setiap halaman (raise FinishUploadCancelled)
+        """
+        store = self.store
+        offset = start = store.uploaded
+        count = store.count
+        if self.legacy or offset >= count:
+            return 0
+
+        # Satu iterator untuk semua halaman; dibuat ulang hanya kalau backend minta offset lain
+        entries = store.iter_entry_json(offset)
+        # Offset yang diminta lewat 409 sejak halaman terakhir diterima
+        resumed = set()
+        while offset < count:
+            self._check_cancel(cancel)
+            items = list(islice(entries, min(self.page_size, count - offset)))
+            if not items:
+                break
+
+            response = self._post_page(offset, items)
+            if response.status_code in (404, 405) and offset == 0 and not self.pages_sent:
+                self.legacy = True
+                return 0
+
+            if response.status_code == 409:
+                resume = self._next_offset(response, offset)
+                # Tanpa next_offset baru halaman yang sama dikirim ulang terus
+                if resume == offset or resume < 0 or resume in resumed:
+                    raise FinishUploadError(
+                        f"page at offset {offset} rejected - 409 without a new resume offset "
+                        f"(next_offset {resume})"
+                    )
+                resumed.add(resume)
+                offset = resume
+                print(f"↻ Backend requested resume from item {offset}")
+                store.mark_uploaded(offset)
+                entries = store.iter_entry_json(offset)
+                continue
+
+            if response.status_code != 200:
+                raise FinishUploadError(
+                    f"page at offset {offset} failed - {response.status_code}: {response.text}"
+                )
+
+            expected = offset + len(items)
+            offset = self._next_offset(response, expected)
+            store.mark_uploaded(offset)
+            if offset != expected:
+                entries = store.iter_entry_json(offset)
+            self.pages_sent += 1
+            resumed.clear()
+
+        return offset - start
+
+    @staticmethod
+    def _check_cancel(cancel):
+        if cancel is not None and cancel.is_set():
+            raise FinishUploadCancelled("upload cancelled")
+
+    def finish(self):
+        """Tutup batch setelah semua halaman diterima"""
+        store = self.store
+        response = self.client.finish_batch(
+            store.batch_record_id,
+            json={"total": store.count, "chunked": True},
+            timeout=self.timeout,
+            idempotency_key=idempotency_key(store.batch_record_id, "finish", store.count),
+        )
+        if response.status_code != 200:
+            raise FinishUploadError(f"finish failed - {response.status_code}: {response.text}")
+        return response
+
+    def _post_page(self, offset, items):
+        # items sudah berupa teks JSON dari session store, cukup digabung
+        body = f'{{"offset":{offset},"items":[{",".join(items)}]}}'.encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.compress:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+        self.bytes_sent += len(body)
+        return self.client.post_finish_items(
+            self.store.batch_record_id,
+            params={"offset": offset},
+            data=body,
+            headers=headers,
+            timeout=self.timeout,
+            idempotency_key=idempotency_key(self.store.batch_record_id, "items", offset, len(items)),
+        )
+
+    @staticmethod
+    def _next_offset(response, default):
+        try:
+            return int(response.json().get("next_offset", default))
+        except (ValueError, AttributeError, TypeError):
+            return default
+
+    def _upload_legacy(self):
+        """Backend lama: satu POST, body JSON array di-stream dari session store"""
+        store = self.store
+        timeout = LEGACY_TIMEOUT + LEGACY_TIMEOUT_PER_1000 * store.count / 1000
+        print(f"⚠ Chunked finish not supported by backend, sending single body ({store.count} items)")
+        response = self.client.finish_batch(
+            store.batch_record_id,
+            data=store.iter_finish_payload(),
+            headers={"Content-Type": "application/json"},
+            timeout=timeout,
+            idempotency_key=idempotency_key(store.batch_record_id, "finish-legacy", store.count),
+        )
+        if response.status_code != 200:
+            raise FinishUploadError(f"finish failed - {response.status_code}: {response.text}")
+        return response
@@ -0,0 +1,22 @@
+"""
+Sample latency bersama untuk statistik yang dicetak saat STOP (API, serial,
+RESULT round-trip, scanner input). Hanya LATENCY_SAMPLES sample terakhir
+yang disimpan supaya memory tetap kecil di shift panjang.
+"""
+
+from collections import deque
+
+LATENCY_SAMPLES = 1000
+
+
+def latency_samples(maxlen=LATENCY_SAMPLES):
+    """Buffer sample (detik) yang membuang sample tertua kalau penuh"""
+    return deque(maxlen=maxlen)
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile (p 0..1) dari samples; 0.0 kalau kosong"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
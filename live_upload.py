@@ -0,0 +1,107 @@
+"""
+Upload item ke backend selama batch berjalan (micro-batch di background).
+
+Session store berfungsi sebagai outbox yang durable: item di-commit ke disk
+dulu, lalu thread uploader mengirim item yang belum diterima backend lewat
+FinishUploader.upload_pending() setiap ada MICRO_BATCH_SIZE item baru atau
+paling lambat setiap FLUSH_INTERVAL detik. Offset yang sudah diterima
+disimpan di store (mark_uploaded), jadi kalau API mati item tetap aman di
+disk dan dikirim lagi saat API hidup (backoff + jitter sampai MAX_BACKOFF detik).
+
+Saat STOP tinggal stop() thread ini lalu FinishUploader.upload() yang hanya
+perlu mengirim ekor batch + finish.
+"""
+
+import threading
+
+import requests
+
+from finish_upload import FinishUploadCancelled, FinishUploadError, FinishUploader
+from retry_queue import backoff_delay
+
+MICRO_BATCH_SIZE = 50
+FLUSH_INTERVAL = 1.0
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+
+class LiveUploader:
+    def __init__(self, uploader: FinishUploader, micro_batch_size=MICRO_BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL):
+        self.uploader = uploader
+        self.store = uploader.store
+        self.micro_batch_size = micro_batch_size
+        self.flush_interval = flush_interval
+
+        self.items_sent = 0
+        self.errors = 0
+        self.api_down = False
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    @property
+    def pending(self):
+        return self.store.count - self.store.uploaded
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """Dipanggil setelah item di-commit; bangunkan thread kalau micro-batch penuh"""
+        # Saat API mati biarkan backoff yang menentukan kapan retry
+        if not self.api_down and self.pending >= self.micro_batch_size:
+            self._wake.set()
+
+    def stop(self, timeout=None):
+        """
+        Hentikan thread: request yang sedang jalan ditunggu selesai, halaman
+        berikutnya tidak dikirim. timeout = batas tunggu (saat app ditutup).
+        """
+        if not self._thread:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"⚠ Live upload still running after {timeout:.0f}s, not waiting")
+        self._thread = None
+
+    def _run(self):
+        failures = 0
+        delay = self.flush_interval
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set() or self.uploader.legacy:
+                break
+            if not self.pending:
+                continue
+
+            try:
+                self.items_sent += self.uploader.upload_pending(self._stop)
+            except FinishUploadCancelled:
+                break
+            except (FinishUploadError, requests.RequestException) as e:
+                self.errors += 1
+                if not self.api_down:
+                    print(f"⚠ Live upload paused, {self.pending} items in outbox: {e}")
+                self.api_down = True
+                delay = backoff_delay(failures, MIN_BACKOFF, MAX_BACKOFF)
+                failures += 1
+                continue
+
+            if self.api_down:
+                print(f"✅ Live upload resumed - {self.store.uploaded}/{self.store.count} items uploaded")
+            self.api_down = False
+            failures = 0
+            delay = self.flush_interval
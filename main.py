@@ -3,13 +3,36 @@ import platform
 import time
 import threading
 import json
+import uuid
 from datetime import datetime
+from itertools import islice
 import requests
 import customtkinter as ctk
 from PIL import Image, ImageTk
 import serial
 import serial.tools.list_ports
 
+from api_client import DEFAULT_BASE_URL, BatchApiClient
+from db_snapshot import SnapshotDatabase, compile_snapshot, is_snapshot_fresh, snapshot_path
+from db_watcher import InotifyWatcher
+from finish_upload import FinishUploadError, FinishUploader
+from live_upload import LiveUploader
+from result_tracker import ResultTracker
+from retry_queue import START_RETRY_DELAY, FinishRetryQueue, retry_request
+from scanner_db import ScannerDatabase, delta_identity, delta_path
+from scanner_evdev import EvdevScannerInput, parse_device_map
+from scanner_input import ScannerInput
+from serial_engine import (
+    DECISION_REPLAY_MAX_AGE, READ_TIMEOUT, SerialReader, SerialSupervisor, SerialWriter, wait_ready,
+)
+from serial_protocol import make_protocol
+from session_journal import SessionJournal
+from session_store import SqliteSessionStore
+from session_records import ItemIdSequence, ItemRecord, ScanResult, SessionEntry
+
+# Batas tunggu per thread background (upload, session store) saat app ditutup
+SHUTDOWN_TIMEOUT = 3.0
+
 # ------------ Konfigurasi UI - White/Blue Theme ------------
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("blue")
@@ -34,20 +57,19 @@ class SettingsDialog(ctk.CTkToplevel):
 
         # Window setup
         self.title("Settings - Scanner Validation")
-        self.geometry("600x400")
+        self.geometry("600x460")
         self.resizable(False, False)
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Make modal
         self.transient(parent)
         self.batch_record_id = None  # Simpan record_id dari API start
-        self.api_base_url = "http://127.0.0.1:8000"  # Base URL API
 
         # Center window
         self.update_idletasks()
         x = (self.winfo_screenwidth() // 2) - (600 // 2)
-        y = (self.winfo_screenheight() // 2) - (400 // 2)
-        self.geometry(f"600x400+{x}+{y}")
+        y = (self.winfo_screenheight() // 2) - (460 // 2)
+        self.geometry(f"600x460+{x}+{y}")
 
         self.update()
         self.deiconify()
@@ -61,6 +83,7 @@ class SettingsDialog(ctk.CTkToplevel):
             "scanner1": self.check_scanner1.get(),
             "scanner2": self.check_scanner2.get(),
             "scanner3": self.check_scanner3.get(),
+            "row_check": self.check_row.get(),
         }
         self.destroy()
 
@@ -170,6 +193,26 @@ class SettingsDialog(ctk.CTkToplevel):
         if self.validation_settings.get("scanner3", False):
             self.check_scanner3.select()
 
+        # Row consistency
+        row_frame = ctk.CTkFrame(self.checkbox_frame, fg_color="#ffffff", corner_radius=8, height=50)
+        row_frame.pack(fill="x", pady=5)
+        row_frame.pack_propagate(False)
+
+        self.check_row = ctk.CTkCheckBox(
+            row_frame,
+            text="Row Check - Scanner 2/3 must match Scanner 1's DB row",
+            font=ctk.CTkFont("Segoe UI", 12, "bold"),
+            text_color=TEXT_PRIMARY,
+            fg_color=BCA_BLUE,
+            hover_color=BCA_DARK_BLUE,
+            checkbox_width=22,
+            checkbox_height=22,
+        )
+        self.check_row.pack(side="left", padx=15, pady=12)
+
+        if self.validation_settings.get("row_check", False):
+            self.check_row.select()
+
         # Info box
         info_frame = ctk.CTkFrame(main_frame, fg_color="#e3f2fd", corner_radius=8, border_width=1, border_color="#2196f3")
         info_frame.pack(fill="x", pady=(0, 15))
@@ -216,6 +259,7 @@ class SettingsDialog(ctk.CTkToplevel):
             'scanner1': self.check_scanner1.get(),
             'scanner2': self.check_scanner2.get(),
             'scanner3': self.check_scanner3.get(),
+            'row_check': self.check_row.get(),
         }
         if self.grab_current() == self:
             self.grab_release()
@@ -326,20 +370,58 @@ class App(ctk.CTk):
 
         # serial
         self.arduino = None
-        self.serial_thread = None
+        self.serial_reader = None
+        # Harus sama dengan firmware Arduino (Serial.begin / mode protokol)
+        self.SERIAL_BAUDRATE = int(os.environ.get("BCA_SERIAL_BAUDRATE", 9600))
+        self.SERIAL_PROTOCOL = os.environ.get("BCA_SERIAL_PROTOCOL", "text")  # "text" / "binary"
+        self.serial_protocol = make_protocol(self.SERIAL_PROTOCOL)
+        # Satu writer untuk semua koneksi: antrian tetap ada selama reconnect
+        # Waktu transit item dari scanner ke diverter: test_pass / test_fail yang
+        # antri lebih lama dari ini tidak dikirim setelah reconnect
+        self.BELT_TRANSIT_TIME = float(os.environ.get("BCA_BELT_TRANSIT_TIME", DECISION_REPLAY_MAX_AGE))
+        self.serial_writer = SerialWriter(
+            None,
+            self.serial_protocol.encode,
+            on_error=lambda e: self.after(0, lambda: self._on_serial_lost(self.serial_writer.port, e)),
+            decision_max_age=self.BELT_TRANSIT_TIME,
+        )
+        self.serial_supervisor = SerialSupervisor(self._find_arduino_port, self._serial_connect)
+        # Keputusan test_pass / test_fail vs RESULT dari Arduino, per item_id
+        self.result_tracker = ResultTracker()
         self.system_running = False
         self.current_item_id = None
+        self.item_ids = ItemIdSequence()
 
         # item tracking
         self.current_item = None
         self.item_counter = 0
 
-        # buffer scanner
-        self.buffer = ""
-        self.flush_job = None
+        # input scanner (keyboard wedge): kode diakhiri Return atau jeda adaptif
+        self.scanner_input = ScannerInput(self.after, self.after_cancel, self._process_code)
+        # Opsional (Linux): setiap scanner dibaca dari device evdev-nya sendiri, buffer terpisah
+        self.scanner_devices = parse_device_map(os.environ.get("BCA_SCANNER_DEVICES", ""))
+        self.device_inputs = {}
+        self.evdev_input = None
 
         # *** SESSION DATA LOGGING ***
-        self.session_data = []  # Array untuk menyimpan semua scan
+        # Item yang di-commit langsung ditulis ke disk (bukan list di RAM).
+        # Backend: "sqlite" (SqliteSessionStore) atau "journal" (SessionJournal)
+        self.SESSION_STORE_BACKEND = "sqlite"
+        self.session_store = self._session_store_class()(self.get_session_store_path())
+        # Client batch API (keep-alive, latency per endpoint); base URL bisa di-override lewat env
+        self.api = BatchApiClient(os.environ.get("BCA_API_BASE_URL", DEFAULT_BASE_URL))
+        # /batch/start diulang beberapa kali (worker thread) sebelum dianggap gagal
+        self.START_ATTEMPTS = 4
+        # Batch yang finish-nya gagal di-retry di background sampai berhasil
+        self.finish_retry = FinishRetryQueue(self.api)
+
+        # Item dikirim ke backend selama batch berjalan; session store = outbox
+        self.live_uploader = None
+        # "start" / "stop" selama request API berjalan di worker thread
+        self.api_pending = None
+        # Item yang di-commit saat START masih menunggu API
+        self.pending_items = []
+        self.batch_record_id = None
         self.session_start_time = None
         self.session_end_time = None
 
@@ -359,8 +441,34 @@ class App(ctk.CTk):
         # *** Validation Settings ***
         self.validation_settings = self.load_validation_settings()
 
+        # Bloom prefilter per kolom scanner di depan lookup snapshot mmap
+        self.DB_PREFILTER_ENABLED = True
+
+        # Reload DB di worker thread, hasilnya di-swap di Tk thread
+        self.db_reload_thread = None
+        self.db_reload_pending = False
+
+        # Snapshot biner hanya untuk start cepat; di-compile ulang di background
+        self.db_snapshot_thread = None
+        self.db_snapshot_pending = False
+
+        # === DB watcher state (PERBAIKAN: inisialisasi di awal) ===
+        self.db_file_path = os.path.expanduser("~/scanner-db.json")
+        self.db_last_mtime = 0
+        self.db_watch_job = None
+        self.DB_WATCH_INTERVAL_MS = 10000  # 10 detik (fallback polling)
+        self.db_watch_enabled = True
+        self.db_inotify = None
+
+        # Delta sidecar (~/scanner-db.delta.jsonl): byte offset yang sudah diterapkan
+        # dan identitas file-nya (delta_identity), supaya file pengganti terdeteksi
+        self.db_delta_path = delta_path(self.db_file_path)
+        self.db_delta_offset = 0
+        self.db_delta_identity = None
+        self.db_delta_inotify = None
+
         # *** Database JSON ***
-        self.database = []
+        self.database = ScannerDatabase()
         self._load_database()
 
         # Tracking scanner status
@@ -377,13 +485,6 @@ class App(ctk.CTk):
             "SCANER 3": None,
         }
 
-        # === DB watcher state (PERBAIKAN: inisialisasi di awal) ===
-        self.db_file_path = os.path.expanduser("~/scanner-db.json")
-        self.db_last_mtime = 0
-        self.db_watch_job = None
-        self.DB_WATCH_INTERVAL_MS = 10000  # 10 detik
-        self.db_watch_enabled = True
-
         # ---------- EXIT BUTTON ----------
         self.bind("<Escape>", self.exit_fullscreen)
         self.bind("<Control-q>", lambda e: self.on_close())
@@ -395,35 +496,58 @@ class App(ctk.CTk):
 
         self.start_db_watcher()
 
+        # Batch yang belum selesai sebelum crash / restart
+        self._recover_session()
+        self._resume_pending_finishes()
+
         # ---------- SERIAL ----------
         self._connect_arduino()
         self._start_status_loop()
 
         # keybinding scanner
         self.bind_all("<KeyPress>", self.on_key)
+        self._start_evdev_input()
 
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def start_db_watcher(self):
-        """Start database file watcher - checks every 10 seconds"""
+        """
+        Start database file watcher. Di Linux pakai inotify (event-driven),
+        selain itu fallback ke polling mtime setiap 10 detik.
+        """
         # Cancel existing watcher jika ada
         if self.db_watch_job:
             self.after_cancel(self.db_watch_job)
             self.db_watch_job = None
 
-        def _tick():
+        if self.db_inotify and self.db_inotify.running:
+            return
+
+        if InotifyWatcher.available():
             try:
-                if not self.db_watch_enabled:
-                    return
+                self.db_inotify = InotifyWatcher(
+                    self.db_file_path,
+                    lambda: self.after(0, self._check_db_changed),
+                )
+                self.db_delta_inotify = InotifyWatcher(
+                    self.db_delta_path,
+                    lambda: self.after(0, self._check_db_changed),
+                )
+                self.db_inotify.start()
+                self.db_delta_inotify.start()
+                print("👀 DB watcher: inotify")
+                # Tangkap perubahan yang terjadi sebelum watch aktif
+                self._check_db_changed()
+                return
+            except OSError as e:
+                print(f"⚠ inotify unavailable ({e}), fallback to polling")
+                self.db_inotify.stop()
+                self.db_inotify = None
+                self.db_delta_inotify = None
 
-                if os.path.exists(self.db_file_path):
-                    mtime = os.path.getmtime(self.db_file_path)
-                    if mtime != self.db_last_mtime:
-                        self.db_last_mtime = mtime
-                        self._load_database()
-                        print("✅ scanner-db.json changed -> reloaded")
-            except Exception as e:
-                print(f"❌ DB watcher error: {e}")
+        def _tick():
+            try:
+                self._check_db_changed()
             finally:
                 # Schedule next tick
                 self.db_watch_job = self.after(self.DB_WATCH_INTERVAL_MS, _tick)
@@ -431,46 +555,234 @@ class App(ctk.CTk):
         # Start first tick
         _tick()
 
+    def _check_db_changed(self):
+        """
+        Full reload kalau mtime scanner-db.json berubah, selain itu cukup
+        terapkan baris baru di delta sidecar.
+        """
+        try:
+            if not self.db_watch_enabled:
+                return
+
+            if os.path.exists(self.db_file_path):
+                mtime = os.path.getmtime(self.db_file_path)
+                if mtime != self.db_last_mtime:
+                    self.db_last_mtime = mtime
+                    print("🔄 scanner-db.json changed -> reloading in background")
+                    self.reload_database()
+                    return
+
+            self._apply_db_delta()
+        except Exception as e:
+            print(f"❌ DB watcher error: {e}")
+
+    def _apply_db_delta(self):
+        """Terapkan baris delta yang belum diproses ke self.database (Tk thread)"""
+        if self.db_delta_offset:
+            identity = self.db_delta_identity
+            if delta_identity(self.db_delta_path, len(identity[2]) if identity else 0) != identity:
+                # Delta dihapus / diganti file lain -> base + delta harus dibaca ulang
+                print("🔄 scanner-db delta replaced -> full reload")
+                self.reload_database()
+                return
+
+        size = os.path.getsize(self.db_delta_path) if os.path.exists(self.db_delta_path) else 0
+
+        if size == self.db_delta_offset:
+            return
+
+        if size < self.db_delta_offset:
+            # Delta di-truncate -> base + delta harus dibaca ulang
+            print("🔄 scanner-db delta truncated -> full reload")
+            self.reload_database()
+            return
+
+        start = time.perf_counter()
+        self.db_delta_offset, added, removed = self.database.apply_delta(
+            self.db_delta_path, self.db_delta_offset
+        )
+        self.db_delta_identity = delta_identity(self.db_delta_path, self.db_delta_offset)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if added or removed:
+            print(f"✅ Scanner DB delta applied: +{added} / -{removed} ({elapsed_ms:.1f} ms)")
+
     def reload_database(self):
-        self._load_database()
-        print("🔄 Scanner DB reloaded")
+        """
+        Reload DB di worker thread supaya on_key tidak ikut freeze.
+        Parse + index jalan di thread, swap self.database di Tk thread.
+        """
+        if self.db_reload_thread and self.db_reload_thread.is_alive():
+            # Reload sedang jalan, ulangi sekali lagi setelah selesai
+            self.db_reload_pending = True
+            return
 
-    def _load_database(self):
+        t = threading.Thread(target=self._db_reload_worker, daemon=True)
+        self.db_reload_thread = t
+        t.start()
+
+    def _db_reload_worker(self):
+        try:
+            database, delta_offset, delta_ident = self._read_database()
+        except Exception as e:
+            # Snapshot lama tetap dipakai kalau file sedang ditulis / rusak
+            print(f"❌ Error reloading scanner-db.json: {e}")
+            database, delta_offset, delta_ident = None, None, None
+
+        self.after(0, lambda: self._swap_database(database, delta_offset, delta_ident))
+
+    def _swap_database(self, database, delta_offset, delta_ident):
+        """Dipanggil di Tk thread: ganti snapshot DB dalam satu assignment"""
+        self.db_reload_thread = None
+
+        if database is not None:
+            self.database = database
+            self.db_delta_offset = delta_offset
+            self.db_delta_identity = delta_ident
+            print(f"✅ Scanner DB reloaded ({len(database)} entries)")
+            self._refresh_snapshot()
+
+        if self.db_reload_pending:
+            self.db_reload_pending = False
+            self.reload_database()
+        elif database is not None:
+            # Delta yang masuk selama reload berjalan
+            self._apply_db_delta()
+
+    def _read_database(self, warm=False):
         """
-        Load database dari ~/scanner-db.json dan normalisasi ke format internal GUI
+        Parse ~/scanner-db.json + delta sidecar ke ScannerDatabase baru tanpa
+        menyentuh self.database, jadi aman dipanggil dari worker thread.
+
+        warm=True (startup): kalau snapshot biner masih cocok dengan JSON,
+        snapshot di-mmap supaya app langsung siap. Validasi live tetap memakai
+        ScannerDatabase (dict, O(1)), dibangun setelahnya lewat reload_database.
+
+        Return (database, offset delta yang sudah diterapkan, identitas file delta).
         """
-        db_path = os.path.expanduser("~/scanner-db.json")
+        database = None
+        if not os.path.exists(self.db_file_path):
+            print(f"⚠ Database file not found: {self.db_file_path}")
+            database = ScannerDatabase()
+        elif warm and is_snapshot_fresh(self.db_file_path):
+            try:
+                database = SnapshotDatabase(snapshot_path(self.db_file_path))
+            except Exception as e:
+                print(f"⚠ Scanner DB snapshot unavailable ({e}), loading JSON")
 
-        if not os.path.exists(db_path):
-            print(f"⚠ Database file not found: {db_path}")
-            self.database = []
-            return
+        if database is None:
+            # Index per kolom scanner dibangun sekali di sini
+            database = ScannerDatabase.load(self.db_file_path)
+
+        # Index in-memory (dict) sudah lebih cepat dari Bloom filter,
+        # prefilter hanya berguna di depan binary search snapshot
+        if self.DB_PREFILTER_ENABLED and isinstance(database, SnapshotDatabase):
+            database.enable_prefilter()
+
+        delta_offset = 0
+        if os.path.exists(self.db_delta_path):
+            delta_offset, _, _ = database.apply_delta(self.db_delta_path)
 
+        return database, delta_offset, delta_identity(self.db_delta_path, delta_offset)
+
+    def _load_database(self):
+        """
+        Load database dari ~/scanner-db.json secara sinkron (dipakai saat startup)
+        """
         try:
-            with open(db_path, "r", encoding="utf-8") as f:
-                raw_data = json.load(f)
-
-            normalized = []
-            for row in raw_data:
-                normalized.append({
-                    "SCANER 1": row.get("Scanner 1"),
-                    "SCANER 2": row.get("Scanner 2"),
-                    "SCANER 3": row.get("Scanner 3"),
-                })
-
-            self.database = normalized
+            if os.path.exists(self.db_file_path):
+                self.db_last_mtime = os.path.getmtime(self.db_file_path)
+
+            self.database, self.db_delta_offset, self.db_delta_identity = self._read_database(warm=True)
             print(f"✓ Database loaded from scanner-db.json ({len(self.database)} entries)")
 
         except Exception as e:
             print(f"❌ Error loading scanner-db.json: {e}")
-            self.database = []
+            self.database = ScannerDatabase()
+            return
+
+        if isinstance(self.database, SnapshotDatabase):
+            # Start dari snapshot: index in-memory dibangun di background lalu di-swap
+            self.reload_database()
+        else:
+            self._refresh_snapshot()
+
+    def _refresh_snapshot(self):
+        """Compile ulang snapshot biner di background kalau JSON sudah berubah"""
+        if not os.path.exists(self.db_file_path):
+            return
+        if self.db_snapshot_thread and self.db_snapshot_thread.is_alive():
+            self.db_snapshot_pending = True
+            return
+
+        t = threading.Thread(target=self._snapshot_worker, daemon=True)
+        self.db_snapshot_thread = t
+        t.start()
+
+    def _snapshot_worker(self):
+        try:
+            start = time.perf_counter()
+            if not is_snapshot_fresh(self.db_file_path):
+                compile_snapshot(self.db_file_path)
+                print(f"✓ Scanner DB snapshot rebuilt ({time.perf_counter() - start:.1f}s)")
+        except Exception as e:
+            print(f"⚠ Scanner DB snapshot rebuild failed: {e}")
+
+        self.after(0, self._snapshot_done)
+
+    def _snapshot_done(self):
+        self.db_snapshot_thread = None
+        if self.db_snapshot_pending:
+            self.db_snapshot_pending = False
+            self._refresh_snapshot()
+
+    def get_session_store_path(self):
+        if self.SESSION_STORE_BACKEND == "sqlite":
+            return os.path.expanduser("~/scanner-session.sqlite3")
+        return os.path.expanduser("~/scanner-session.journal")
+
+    def _session_store_class(self):
+        if self.SESSION_STORE_BACKEND == "sqlite":
+            return SqliteSessionStore
+        return SessionJournal
+
+    def _recover_session(self):
+        """Lanjutkan batch dari session store kalau belum sempat di-finish"""
+        store = self._session_store_class().recover(self.get_session_store_path())
+        if not store:
+            return
+
+        self.session_store = store
+        self.batch_record_id = store.batch_record_id
+        # Lanjut dari item terakhir yang sudah tersimpan, ID tidak terpakai dua kali
+        self.item_ids = ItemIdSequence(store.last_item_id)
+        self.session_start_time = datetime.fromisoformat(store.started_at)
+        self.system_running = True
+
+        self.btn_start.configure(state="disabled")
+        self.btn_stop.configure(state="normal")
+        self.system_status_indicator.configure(text_color="#ff9800")
+        self.system_status_label.configure(text="RECOVERED")
+
+        self._start_live_upload()
+
+        print("=" * 60)
+        print("♻️ SESSION RECOVERED")
+        print(f"Batch Record ID: {self.batch_record_id}")
+        print(f"Items recovered: {store.count} ({store.uploaded} already uploaded)")
+        print("=" * 60)
+
+    def _resume_pending_finishes(self):
+        """Batch yang sudah STOP tapi belum finish di backend (mis. app ditutup saat API mati)"""
+        for store in self._session_store_class().pending_finish(self.get_session_store_path()):
+            self.finish_retry.add(store)
+        self.finish_retry.start()
 
     def get_validation_settings_path(self):
         return os.path.expanduser("~/scanner-validation-settings.json")
 
     def load_validation_settings(self):
         path = self.get_validation_settings_path()
-        default = {"scanner1": True, "scanner2": False, "scanner3": False}
+        default = {"scanner1": True, "scanner2": False, "scanner3": False, "row_check": False}
 
         try:
             if os.path.exists(path):
@@ -500,14 +812,8 @@ class App(ctk.CTk):
     def _start_item_if_needed(self):
         """Start new item if not exists - dapat dipanggil oleh scanner aktif manapun"""
         if not self.current_item:
-            self.current_item_id = int(time.time() * 1000) % 100000
-            self.current_item = {
-                "item_id": self.current_item_id,
-                "timestamp": datetime.now().isoformat(),
-                "scanner_1": None,
-                "scanner_2": None,
-                "scanner_3": None
-            }
+            self.current_item_id = self.item_ids.next()
+            self.current_item = ItemRecord(self.current_item_id, datetime.now().isoformat())
             print(f"🆕 ITEM STARTED - ID: {self.current_item_id}")
 
     def _prepare_next_item(self):
@@ -544,37 +850,46 @@ class App(ctk.CTk):
         """
         Buat item baru. HANYA dipanggil oleh SCANNER 1
         """
-        item_id = int(time.time() * 1000) % 100000
-
-        self.current_item = {
-            "item_id": item_id,
-            "timestamp": datetime.now().isoformat(),
-            "scanner_1": {
-                "value": scanner1_code,
-                "valid": None
-            },
-            "scanner_2": None,
-            "scanner_3": None
-        }
+        item_id = self.item_ids.next()
+
+        self.current_item = ItemRecord(
+            item_id,
+            datetime.now().isoformat(),
+            scanner_1=ScanResult(scanner1_code),
+        )
         self.current_item_id = item_id
         print(f"🆕 NEW ITEM STARTED - ID: {item_id}")
 
     def _commit_current_item(self):
         """
-        Simpan current_item ke session_data
+        Simpan current_item ke session store
         """
         if not self.current_item:
             return
 
-        self.session_data.append(self.current_item)
-        print(f"📦 ITEM COMMITTED - ID: {self.current_item['item_id']}")
+        self._append_to_session_store(self.current_item)
+        print(f"📦 ITEM COMMITTED - ID: {self.current_item.item_id}")
 
         self.current_item = None
         self.current_item_id = None
 
+    def _append_to_session_store(self, item):
+        if self.api_pending == "start":
+            # Batch belum ada; ditahan sampai /batch/start selesai
+            self.pending_items.append(item)
+            return
+        if not self.system_running:
+            print(f"⚠ No running batch - item {item.item_id} not saved")
+            return
+
+        self.session_store.append(item)
+        if self.live_uploader:
+            self.live_uploader.notify()
+
     def _save_session_data(self):
-        """Save session data to JSON file when STOP"""
-        if not self.session_data:
+        """Ringkasan session store saat STOP, return path file-nya"""
+        store = self.session_store
+        if not store.count:
             print("⚠ No session data to save")
             return
 
@@ -589,60 +904,54 @@ class App(ctk.CTk):
 
         print("=" * 70)
         print("💾 SESSION DATA SAVED")
-        print(f"📊 Total items: {len(self.session_data)}")
+        print(f"📊 Total items: {store.count}")
+        print(f"📊 Results: {store.result_counts()}")
         print(f"⏱ Duration: {duration_seconds:.2f}s")
         print("=" * 70)
 
         # Preview data
         print("\n📋 DATA PREVIEW (First 3 items):")
-        for i, item in enumerate(self.session_data[:3], 1):
-            print(f"\nItem #{i} (ID: {item.get('item_id', 'N/A')}):")
+        for i, (timestamp, entry) in enumerate(islice(store.iter_items(), 3), 1):
+            print(f"\nItem #{i} (ID: {entry.get('item_id', 'N/A')}):")
             for s in ["scanner_1", "scanner_2", "scanner_3"]:
-                if s in item:
+                if entry.get(s):
                     print(
                         f"  {s.replace('_', ' ').title()}: "
-                        f"{item[s]['value']} - Valid: {item[s]['valid']}"
+                        f"{entry[s]['value']} - Valid: {entry[s]['valid']}"
                     )
-            print(f"  Timestamp: {item.get('timestamp', 'N/A')}")
+            print(f"  Timestamp: {timestamp}")
 
-        if len(self.session_data) > 3:
-            print(f"\n... and {len(self.session_data) - 3} more items")
+        if store.count > 3:
+            print(f"\n... and {store.count - 3} more items")
 
         print("\n" + "=" * 70)
+        return store.path
 
     def _add_to_session(self, scan_data, validation_details, overall_result):
         """Add completed scan to session array with individual scanner validation"""
-        session_entry = {
-            "item_id": self.current_item_id,
-            "timestamp": datetime.now().isoformat(),
-            "validation_result": overall_result
-        }
+        session_entry = SessionEntry(
+            self.current_item_id,
+            datetime.now().isoformat(),
+            validation_result=overall_result,
+            row_match=validation_details.get("row_match"),
+        )
 
         # Add scanner data only if they were scanned
         if scan_data.get("SCANER 1"):
-            session_entry["scanner_1"] = {
-                "value": scan_data["SCANER 1"],
-                "valid": validation_details["scanner_1"]
-            }
+            session_entry.scanner_1 = ScanResult(scan_data["SCANER 1"], validation_details["scanner_1"])
 
         if scan_data.get("SCANER 2"):
-            session_entry["scanner_2"] = {
-                "value": scan_data["SCANER 2"],
-                "valid": validation_details["scanner_2"]
-            }
+            session_entry.scanner_2 = ScanResult(scan_data["SCANER 2"], validation_details["scanner_2"])
 
         if scan_data.get("SCANER 3"):
-            session_entry["scanner_3"] = {
-                "value": scan_data["SCANER 3"],
-                "valid": validation_details["scanner_3"]
-            }
+            session_entry.scanner_3 = ScanResult(scan_data["SCANER 3"], validation_details["scanner_3"])
 
-        self.session_data.append(session_entry)
+        self._append_to_session_store(session_entry)
 
-        print(f"📝 Session entry #{len(self.session_data)} added:")
-        for key, value in session_entry.items():
-            if key.startswith("scanner_"):
-                print(f"  {key}: {value['value']} - Valid: {value['valid']}")
+        print(f"📝 Session entry #{self.session_store.count} added:")
+        for key, scan in session_entry.scans():
+            if scan is not None:
+                print(f"  {key}: {scan.value} - Valid: {scan.valid}")
         print(f"  Overall Result: {overall_result}")
 
     def _is_duplicate_scan(self, scanner_name, code):
@@ -666,31 +975,33 @@ class App(ctk.CTk):
 
         return False
 
-    def _validate_individual_scanner(self, scanner_key, scanner_value):
+    def _validate_individual_scanner(self, scanner_key, scanner_value, database=None):
         """Validate individual scanner value against database"""
         if not scanner_value:
             return None  # Not scanned
 
-        # Check if this value exists in database for this scanner
-        for entry in self.database:
-            if entry.get(scanner_key) == scanner_value:
-                return True
+        if database is None:
+            database = self.database
 
-        return False
+        # Lookup O(1) di index kolom scanner
+        return database.contains(scanner_key, scanner_value)
 
     def _validate_scan_data(self):
         """✅ VALIDASI BARU - Hanya cek scanner yang aktif"""
         if not self.current_item:
             return None, "No active item", None
 
-        s1 = self.current_item.get("scanner_1")
-        s2 = self.current_item.get("scanner_2")
-        s3 = self.current_item.get("scanner_3")
+        s1 = self.current_item.scanner_1
+        s2 = self.current_item.scanner_2
+        s3 = self.current_item.scanner_3
+
+        # Satu snapshot DB untuk semua scanner (reload bisa swap di antaranya)
+        database = self.database
 
         # Validasi individual
-        v1 = self._validate_individual_scanner("SCANER 1", s1["value"]) if s1 else None
-        v2 = self._validate_individual_scanner("SCANER 2", s2["value"]) if s2 else None
-        v3 = self._validate_individual_scanner("SCANER 3", s3["value"]) if s3 else None
+        v1 = self._validate_individual_scanner("SCANER 1", s1.value, database) if s1 else None
+        v2 = self._validate_individual_scanner("SCANER 2", s2.value, database) if s2 else None
+        v3 = self._validate_individual_scanner("SCANER 3", s3.value, database) if s3 else None
 
         validation_details = {
             "scanner_1": v1,
@@ -710,6 +1021,19 @@ class App(ctk.CTk):
         if self._is_scanner_enabled(3):
             results.append(v3)
 
+        # ✅ Row check - scanner 1/2/3 harus dari baris DB yang sama
+        if self.validation_settings.get("row_check", False) and self._is_scanner_enabled(1):
+            row_values = {"SCANER 1": s1.value if s1 else None}
+            if self._is_scanner_enabled(2):
+                row_values["SCANER 2"] = s2.value if s2 else None
+            if self._is_scanner_enabled(3):
+                row_values["SCANER 3"] = s3.value if s3 else None
+
+            if len(row_values) > 1:
+                row_match = database.row_matches(row_values)
+                validation_details["row_match"] = row_match
+                results.append(row_match)
+
         is_valid = all(results) if results else False
 
         return is_valid, "Validation based on enabled scanners", validation_details
@@ -936,53 +1260,98 @@ class App(ctk.CTk):
             print(f"Scanner 1: {'✓ ENABLED' if self.validation_settings['scanner1'] else '✗ DISABLED'}")
             print(f"Scanner 2: {'✓ ENABLED' if self.validation_settings['scanner2'] else '✗ DISABLED'}")
             print(f"Scanner 3: {'✓ ENABLED' if self.validation_settings['scanner3'] else '✗ DISABLED'}")
+            print(f"Row Check: {'✓ ENABLED' if self.validation_settings['row_check'] else '✗ DISABLED'}")
             print("=" * 60)
 
     # ================== SERIAL ==================
 
-    def _connect_to_port(self, port_name):
-        try:
-            if self.arduino and self.arduino.is_open:
-                self.arduino.close()
-
-            self.arduino = serial.Serial(port_name, 9600, timeout=1)
-            time.sleep(2)
-
-            self.arduino_status_indicator.configure(text_color="#4caf50")
-            self.arduino_port_label.configure(text=port_name)
-
-            print(f"✓ Connected to Arduino on {port_name}")
-
-            self._start_serial_thread()
+    def _connect_arduino(self):
+        # Scan + connect (dan reconnect kalau USB putus) di thread supervisor, UI tidak ikut menunggu
+        self.serial_supervisor.start()
 
+    def _find_arduino_port(self):
+        for p in serial.tools.list_ports.comports():
+            if "Arduino" in p.description or "USB-SERIAL" in p.description or "USB Serial" in p.description or "CH340" in p.description:
+                return p.device
+        return None
+
+    def _serial_connect(self, port_name):
+        """Dipanggil di thread supervisor: buka port + tunggu auto-reset Arduino. Return True kalau terbuka"""
+        self.after(0, lambda: self._on_arduino_connecting(port_name))
+        start = time.perf_counter()
+        port = None
+        try:
+            port = serial.Serial(port_name, self.SERIAL_BAUDRATE, timeout=READ_TIMEOUT)
+            framer = self.serial_protocol.decoder()
+            lines = wait_ready(port, framer, self.serial_protocol.encode("status"))
         except Exception as e:
             print(f"❌ Failed to connect to {port_name}: {e}")
-            self.arduino = None
+            if port:
+                port.close()
+            self.after(0, lambda: self.arduino_status_indicator.configure(text_color="#ff4444"))
+            return False
+
+        elapsed = time.perf_counter() - start
+        self.after(0, lambda: self._on_arduino_connected(port_name, port, framer, lines, elapsed))
+        return True
+
+    def _on_arduino_connecting(self, port_name):
+        self.arduino_status_indicator.configure(text_color="#ffb300")
+        self.arduino_port_label.configure(text=port_name)
+
+    def _on_arduino_connected(self, port_name, port, framer, lines, elapsed):
+        """Dipanggil di Tk thread setelah port terbuka dan handshake selesai / timeout"""
+        self.arduino = port
+        # Baru sekarang _send_cmd melihat port; sebelumnya perintah tetap diantrikan
+        self.serial_supervisor.connected()
+
+        if lines:
+            self.arduino_status_indicator.configure(text_color="#4caf50")
+            print(f"✓ Connected to Arduino on {port_name} "
+                  f"({self.SERIAL_BAUDRATE} baud, {self.serial_protocol.name} protocol, ready in {elapsed:.2f}s)")
+        else:
+            # Firmware tidak menjawab probe: tetap dipakai, seperti dulu setelah sleep(2)
+            self.arduino_status_indicator.configure(text_color="#ffb300")
+            print(f"⚠ Arduino on {port_name} did not answer within {elapsed:.1f}s, using it anyway")
+
+        self._start_serial_thread(framer)
+        for line in lines:
+            self._handle_serial_line(line)
+
+    def _start_serial_thread(self, framer=None):
+        if self.serial_reader:
+            self.serial_reader.stop()
+
+        port = self.arduino
+        # Burst baris dari Arduino masuk ke Tk thread dalam satu after(0)
+        self.serial_reader = SerialReader(
+            port,
+            self._handle_serial_line,
+            lambda callback: self.after(0, callback),
+            on_error=lambda e: self._on_serial_lost(port, e),
+            framer=framer or self.serial_protocol.decoder(),
+        )
+        self.serial_reader.start()
 
-    def _connect_arduino(self):
-        ports = serial.tools.list_ports.comports()
+        # write + flush ke UART di thread sendiri, Tk thread hanya antri perintah
+        self.serial_writer.attach(port)
 
-        for p in ports:
-            if "Arduino" in p.description or "USB-SERIAL" in p.description or "USB Serial" in p.description or "CH340" in p.description:
-                self._connect_to_port(p.device)
-                return
+    def _on_serial_lost(self, port, error):
+        """Dipanggil di Tk thread saat read / write gagal: tutup port, supervisor reconnect"""
+        if port is None or port is not self.arduino:
+            return
 
-        print("⚠ No Arduino found")
+        print(f"🔌 Arduino disconnected: {error}")
+        if self.serial_reader:
+            self.serial_reader.stop()
+        self.serial_writer.detach()
+        try:
+            port.close()
+        except Exception:
+            pass
         self.arduino = None
-
-    def _start_serial_thread(self):
-        t = threading.Thread(target=self._serial_reader, daemon=True)
-        t.start()
-        self.serial_thread = t
-
-    def _serial_reader(self):
-        while self.arduino and self.arduino.is_open:
-            try:
-                line = self.arduino.readline().decode(errors="ignore").strip()
-                if line:
-                    self.after(0, lambda l=line: self._handle_serial_line(l))
-            except Exception:
-                break
+        self.arduino_status_indicator.configure(text_color="#ff4444")
+        self.serial_supervisor.disconnected()
 
     def _handle_serial_line(self, line: str):
         if not line.strip():
@@ -991,10 +1360,25 @@ class App(ctk.CTk):
         if line.startswith("RESULT:PASS:"):
             item_id = line.split(":")[-1]
             print(f"🟢 Arduino PASS - ID: {item_id}")
+            self._track_result(item_id, "PASS")
 
         elif line.startswith("RESULT:FAIL:"):
             item_id = line.split(":")[-1]
             print(f"🔴 Arduino FAIL - ID: {item_id}")
+            self._track_result(item_id, "FAIL")
+
+    def _track_result(self, item_id, result):
+        try:
+            item_id = int(item_id)
+        except ValueError:
+            print(f"⚠ RESULT with invalid item ID: {item_id}")
+            return
+
+        status = self.result_tracker.result_received(item_id, result)
+        if status == "mismatch":
+            print(f"❌ DIVERTER MISMATCH - ID: {item_id}, Arduino {result} but GUI decided the opposite")
+        elif status == "unknown":
+            print(f"⚠ RESULT for unknown / expired item ID: {item_id}")
 
     def _show_result_notification(self, is_pass: bool):
         if is_pass:
@@ -1016,10 +1400,12 @@ class App(ctk.CTk):
 
     def _send_cmd(self, cmd: str):
         if self.arduino and self.arduino.is_open:
-            full_cmd = cmd + "\n"
-            self.arduino.write(full_cmd.encode("utf-8"))
-            self.arduino.flush()
-            print(f">> SENT: '{cmd}'")
+            if self.serial_writer.send(cmd):
+                print(f">> SENT: '{cmd}'")
+        elif self.serial_supervisor.reconnecting:
+            # Dikirim setelah reconnect, urutan tetap
+            if self.serial_writer.send(cmd):
+                print(f">> QUEUED (Arduino reconnecting): '{cmd}'")
         else:
             print("❌ Arduino belum terhubung")
 
@@ -1027,57 +1413,98 @@ class App(ctk.CTk):
         if self.arduino and self.arduino.is_open:
             self._send_cmd("status")
 
+        for item_id in self.result_tracker.expire():
+            print(f"⚠ No RESULT from Arduino for item ID: {item_id}")
+
         self.after(3000, self._start_status_loop)
 
     # ================== START / STOP ==================
 
+    def _set_api_pending(self, action):
+        """START/STOP sedang menunggu API: tombol dikunci, status kuning"""
+        self.api_pending = action
+        self.btn_start.configure(state="disabled")
+        self.btn_stop.configure(state="disabled")
+        self.system_status_indicator.configure(text_color="#ff9800")
+        self.system_status_label.configure(text="STARTING..." if action == "start" else "STOPPING...")
+
     def start_system(self):
         if not self.arduino or not self.arduino.is_open:
             print("Tidak bisa START - Arduino belum terhubung!")
             return
+        if self.api_pending:
+            return
+
+        # Ambil scanner_used dari settings yang dicentang
+        scanner_used = []
+        if self.validation_settings.get('scanner1', False):
+            scanner_used.append(1)
+        if self.validation_settings.get('scanner2', False):
+            scanner_used.append(2)
+        if self.validation_settings.get('scanner3', False):
+            scanner_used.append(3)
+
+        # Generate dummy batch_code
+        batch_code = f"BCA-2025{int(time.time() * 1000) % 1000000:06d}"
+
+        payload = {
+            "scanner_used": scanner_used,
+            "batch_code": batch_code
+        }
+
+        # Item ID mulai dari 1 untuk batch baru (item yang masuk selama /batch/start ikut batch ini)
+        self.item_ids = ItemIdSequence()
+        for item_id in self.result_tracker.reset():
+            print(f"⚠ No RESULT from Arduino for item ID: {item_id} (previous batch)")
+
+        # API call di worker thread supaya on_key tetap jalan selama request
+        self._set_api_pending("start")
+        threading.Thread(target=self._api_start_worker, args=(payload,), daemon=True).start()
 
+    def _api_start_worker(self, payload):
         # ========== API CALL START ==========
+        record_id = None
+        # Key yang sama di setiap retry: backend tidak membuat batch dobel kalau response pertama hilang
+        key = f"bca-start-{payload['batch_code']}-{uuid.uuid4().hex}"
         try:
-            # Ambil scanner_used dari settings yang dicentang
-            scanner_used = []
-            if self.validation_settings.get('scanner1', False):
-                scanner_used.append(1)
-            if self.validation_settings.get('scanner2', False):
-                scanner_used.append(2)
-            if self.validation_settings.get('scanner3', False):
-                scanner_used.append(3)
-
-            # Generate dummy batch_code
-            import random
-            batch_code = f"BCA-2025{int(time.time() * 1000) % 1000000:06d}"
-
-            payload = {
-                "scanner_used": scanner_used,
-                "batch_code": batch_code
-            }
-
-            response = requests.post(
-                f"http://127.0.0.1:8000/batch/start",
-                json=payload,
-                timeout=10
+            response = retry_request(
+                lambda: self.api.start_batch(payload, idempotency_key=key),
+                self.START_ATTEMPTS,
+                base=START_RETRY_DELAY,
+                label="BATCH START",
             )
 
             if response.status_code == 200 or response.status_code == 201:
                 result = response.json()
-                self.batch_record_id = result.get('record_id')  # Asumsi API return {'id': 123}
+                record_id = result.get('record_id')  # Asumsi API return {'id': 123}
 
-                print(f"✅ BATCH START SUCCESS - Record ID: {self.batch_record_id}")
-                print(f"   Scanner used: {scanner_used}")
-                print(f"   Batch code: {batch_code}")
+                print(f"✅ BATCH START SUCCESS - Record ID: {record_id}")
+                print(f"   Scanner used: {payload['scanner_used']}")
+                print(f"   Batch code: {payload['batch_code']}")
             else:
                 print(f"❌ BATCH START FAILED - {response.status_code}: {response.text}")
-                return  # Stop jika API gagal
 
         except Exception as e:
             print(f"❌ API START ERROR: {e}")
+
+        self.after(0, lambda: self._on_batch_started(record_id))
+
+    def _on_batch_started(self, record_id):
+        """Dipanggil di Tk thread setelah /batch/start selesai"""
+        self.api_pending = None
+
+        if record_id is None:
+            # Stop jika API gagal
+            self.btn_start.configure(state="normal")
+            self.system_status_indicator.configure(text_color="#ff4444")
+            self.system_status_label.configure(text="START FAILED")
+            if self.pending_items:
+                print(f"⚠ {len(self.pending_items)} items scanned during START discarded")
+                self.pending_items = []
             return
 
         # ========== Lanjutkan logic START asli ==========
+        self.batch_record_id = record_id
         self.system_running = True
         self.btn_start.configure(state="disabled")
         self.btn_stop.configure(state="normal")
@@ -1086,8 +1513,14 @@ class App(ctk.CTk):
 
         self.session_start_time = datetime.now()
 
-        # Reset session data
-        self.session_data = []
+        # Session store baru untuk batch ini
+        self.session_store.start(self.batch_record_id, self.session_start_time.isoformat())
+        self._start_live_upload()
+
+        # Item yang di-commit selama menunggu API masuk ke batch ini
+        pending, self.pending_items = self.pending_items, []
+        for item in pending:
+            self._append_to_session_store(item)
 
         self._send_cmd("start")
 
@@ -1095,61 +1528,52 @@ class App(ctk.CTk):
         print("SYSTEM STARTED")
         print(f"Session started: {self.session_start_time}")
         print(f"Batch Record ID: {self.batch_record_id}")
+        if pending:
+            print(f"Items scanned during START: {len(pending)}")
         print("=" * 60)
 
     def stop_system(self):
         if not self.batch_record_id:
             print("❌ No batch record ID - START dulu!")
             return
+        if self.api_pending:
+            return
 
         self.session_end_time = datetime.now()
 
-        # ========== API CALL FINISH ==========
-        try:
-            # Format data sesuai struktur yang diminta
-            if self.current_item:
-                self._commit_current_item()
-
-            finish_data = []
-            for item in self.session_data:
-                item_entry = {
-                    "item_id": item.get("item_id"),
-                }
-
-                # Scanner 1
-                if "scanner_1" in item:
-                    item_entry["scanner_1"] = item["scanner_1"]
+        # Format data sesuai struktur yang diminta
+        if self.current_item:
+            self._commit_current_item()
 
-                # Scanner 2
-                if "scanner_2" in item:
-                    item_entry["scanner_2"] = item["scanner_2"]
-
-                # Scanner 3
-                if "scanner_3" in item:
-                    item_entry["scanner_3"] = item["scanner_3"]
-
-                res = item.get("validation_result")
-                if isinstance(res, str):
-                    res = res.strip().capitalize()
-
-                item_entry["result"] = res or "Unknown"
-
-                finish_data.append(item_entry)
+        # Scan setelah STOP tidak masuk batch ini lagi
+        self.system_running = False
+        self._set_api_pending("stop")
+        threading.Thread(target=self._api_finish_worker, daemon=True).start()
 
-            response = requests.post(
-                f"http://127.0.0.1:8000/batch/{self.batch_record_id}/finish",
-                json=finish_data,
-                timeout=10
-            )
+    def _api_finish_worker(self):
+        # ========== API CALL FINISH ==========
+        finished = False
+        try:
+            store = self.session_store
+            # Setelah ini batch tidak di-recover sebagai batch aktif, tinggal di-finish
+            store.mark_stopped()
 
-            if response.status_code == 200:
-                print(f"✅ BATCH FINISH SUCCESS - Record ID: {self.batch_record_id}")
-                print(f"   Total items: {len(finish_data)}")
-                print("   Data sent:", json.dumps(finish_data[:2], indent=2))  # Preview 2 items
+            # Sebagian besar item sudah terkirim oleh live uploader; tinggal ekor batch + finish
+            uploader = self._stop_live_upload()
+            try:
+                uploader.upload()
+            except (FinishUploadError, requests.RequestException) as e:
+                print(f"❌ BATCH FINISH FAILED - {e}")
+                print(f"   Uploaded {store.uploaded}/{store.count} items, sisanya di-retry di background")
             else:
-                print(f"❌ BATCH FINISH FAILED - {response.status_code}: {response.text}")
+                finished = True
+                preview = [entry for _, entry in islice(store.iter_items(), 2)]
+                store.finish()
+                print(f"✅ BATCH FINISH SUCCESS - Record ID: {self.batch_record_id}")
+                print(f"   Total items: {store.count} ({uploader.pages_sent} pages, {uploader.bytes_sent} bytes)")
+                print("   Data sent:", json.dumps(preview, indent=2))  # Preview 2 items
 
-            # Save local file juga
+            # Session store di disk = local backup
             savedfile = self._save_session_data()
             if savedfile:
                 print(f"   Local backup: {savedfile}")
@@ -1157,6 +1581,17 @@ class App(ctk.CTk):
         except Exception as e:
             print(f"❌ API FINISH ERROR: {e}")
 
+        self.after(0, lambda: self._on_batch_finished(finished))
+
+    def _on_batch_finished(self, finished):
+        """Dipanggil di Tk thread setelah upload + /batch/{id}/finish selesai"""
+        self.api_pending = None
+
+        if not finished:
+            # Data batch tetap di disk; retry queue yang menyelesaikan, batch baru pakai store baru
+            self.finish_retry.add(self.session_store.park(), attempts=1)
+            self.session_store = self._session_store_class()(self.get_session_store_path())
+
         # ========== Reset semua state ==========
         self.system_running = False
         self.batch_record_id = None
@@ -1169,6 +1604,25 @@ class App(ctk.CTk):
         print("=" * 60)
         print("SYSTEM FINISHED")
         print(f"Session ended: {self.session_end_time}")
+        if self.database.prefilter_stats:
+            print("DB prefilter stats:")
+            print(self.database.prefilter_stats.summary())
+        print("API latency:")
+        print(self.api.latency_summary())
+        if self.serial_reader:
+            print("Serial:")
+            print(self.serial_reader.stats.summary())
+        print("Serial writer:")
+        print(self.serial_writer.stats.summary())
+        print("Serial reconnect:")
+        print(self.serial_supervisor.stats.summary())
+        print("Diverter results:")
+        print(self.result_tracker.summary())
+        print("Scanner input:")
+        print(self.scanner_input.stats.summary())
+        for scanner, engine in self.device_inputs.items():
+            print(f"Scanner input {scanner} (evdev):")
+            print(engine.stats.summary())
         print("=" * 60)
 
         self.db_watch_enabled = True
@@ -1183,7 +1637,24 @@ class App(ctk.CTk):
 
         self._send_cmd("stop")
 
-    # ================== SCANNER TRACKING ==================
+    # ================== LIVE UPLOAD ==================
+
+    def _start_live_upload(self):
+        self._stop_live_upload()
+        uploader = FinishUploader(self.api, self.session_store)
+        self.live_uploader = LiveUploader(uploader)
+        self.live_uploader.start()
+
+    def _stop_live_upload(self, timeout=None):
+        """Stop thread live upload, return FinishUploader-nya untuk dipakai saat STOP"""
+        live = self.live_uploader
+        if not live:
+            return FinishUploader(self.api, self.session_store)
+
+        live.stop(timeout)
+        self.live_uploader = None
+        print(f"📤 Live upload: {live.items_sent} items sent during batch, {live.pending} pending")
+        return live.uploader
 
     def _reset_scanner_tracking(self):
         self.scanner1_received = False
@@ -1218,20 +1689,17 @@ class App(ctk.CTk):
 
         # Cek scanner 1 jika enabled
         if self._is_scanner_enabled(1):
-            s1 = self.current_item.get("scanner_1")
-            if not isinstance(s1, dict):
+            if self.current_item.scanner_1 is None:
                 return
 
         # Cek scanner 2 jika enabled
         if self._is_scanner_enabled(2):
-            s2 = self.current_item.get("scanner_2")
-            if not isinstance(s2, dict):
+            if self.current_item.scanner_2 is None:
                 return
 
         # Cek scanner 3 jika enabled
         if self._is_scanner_enabled(3):
-            s3 = self.current_item.get("scanner_3")
-            if not isinstance(s3, dict):
+            if self.current_item.scanner_3 is None:
                 return
 
         # Semua scanner yang enabled sudah terisi
@@ -1243,7 +1711,7 @@ class App(ctk.CTk):
             return
 
         print("🔥 VALIDATION STARTED")
-        print("CURRENT ITEM:", json.dumps(self.current_item, indent=2, default=str))
+        print("CURRENT ITEM:", json.dumps(self.current_item.to_dict(), indent=2, default=str))
 
         is_valid, message, validation_details = self._validate_scan_data()
 
@@ -1251,21 +1719,23 @@ class App(ctk.CTk):
             return
 
         result = "PASS" if is_valid else "FAIL"
-        self.current_item["validation_result"] = result
+        self.current_item.validation_result = result
+        self.current_item.row_match = validation_details.get("row_match")
 
         # set valid flag
-        if self.current_item.get("scanner_1") and isinstance(self.current_item["scanner_1"], dict):
-            self.current_item["scanner_1"]["valid"] = validation_details["scanner_1"]
-        if self.current_item.get("scanner_2") and isinstance(self.current_item["scanner_2"], dict):
-            self.current_item["scanner_2"]["valid"] = validation_details["scanner_2"]
-        if self.current_item.get("scanner_3") and isinstance(self.current_item["scanner_3"], dict):
-            self.current_item["scanner_3"]["valid"] = validation_details["scanner_3"]
+        for field, scan in self.current_item.scans():
+            if scan is not None:
+                scan.valid = validation_details[field]
 
         # ✅ PRINT SEBELUM COMMIT
         print(f"🎯 VALIDATION RESULT: {result}")
         print(f"   Scanner 1: {validation_details['scanner_1']}")
         print(f"   Scanner 2: {validation_details['scanner_2']}")
         print(f"   Scanner 3: {validation_details['scanner_3']}")
+        if "row_match" in validation_details:
+            print(f"   Row match: {validation_details['row_match']}")
+
+        item_id = self.current_item.item_id
 
         # === COMMIT SETELAH PRINT ===
         self._commit_current_item()
@@ -1276,6 +1746,7 @@ class App(ctk.CTk):
         else:
             self._send_cmd("test_fail")
             self._show_result_notification(False)
+        self.result_tracker.decision_sent(item_id, result)
 
         self._prepare_next_item()
 
@@ -1297,29 +1768,39 @@ class App(ctk.CTk):
 
     # ================== SCANNER INPUT ==================
 
+    def _start_evdev_input(self):
+        if not self.scanner_devices:
+            return
+        if not EvdevScannerInput.available():
+            print("⚠ BCA_SCANNER_DEVICES set but evdev is not available, using keyboard input")
+            return
+
+        self.device_inputs = {
+            scanner: ScannerInput(self.after, self.after_cancel,
+                                  lambda code, scanner=scanner: self._process_code(code, scanner))
+            for scanner in self.scanner_devices
+        }
+        self.evdev_input = EvdevScannerInput(
+            self.scanner_devices,
+            self.device_inputs,
+            lambda callback: self.after(0, callback),
+        )
+        if not self.evdev_input.start():
+            print("⚠ No scanner device could be opened, using keyboard input")
+            self.evdev_input = None
+            self.device_inputs = {}
+
     def on_key(self, event):
         ch = event.char
 
         if event.keysym == "Return":
-            self._process_buffer()
-            self.buffer = ""
+            self.scanner_input.enter()
             return
 
         if ch and ch.isprintable():
-            self.buffer += ch
-            self._schedule_flush(120)
-
-    def _schedule_flush(self, delay_ms: int):
-        if self.flush_job:
-            self.after_cancel(self.flush_job)
-
-        self.flush_job = self.after(delay_ms, self._process_if_pending)
-
-    def _process_if_pending(self):
-        self.flush_job = None
-        if self.buffer:
-            self._process_buffer()
-            self.buffer = ""
+            # Waktu event (ms) dari Tk, bukan waktu handler jalan
+            timestamp = event.time / 1000 if isinstance(event.time, int) else None
+            self.scanner_input.key(ch, timestamp)
 
     def _identify_scanner(self, code: str) -> str:
         code = code.strip()
@@ -1335,17 +1816,19 @@ class App(ctk.CTk):
 
         return "unknown"
 
-    def _process_buffer(self):
-        code = self.buffer.strip()
+    def _process_code(self, code: str, scanner=None):
+        """scanner: sumber kode kalau sudah diketahui (device evdev), selain itu ditebak dari format"""
+        code = code.strip()
         if not code:
             return
 
-        scanner = self._identify_scanner(code)
+        source = "device" if scanner else "format"
+        scanner = scanner or self._identify_scanner(code)
 
         print(f"\n{'='*60}")
         print(f"📥 SCANNER INPUT DETECTED")
         print(f"   Code: {code}")
-        print(f"   Identified as: {scanner}")
+        print(f"   Identified as: {scanner} (by {source})")
         print(f"   Current item exists: {self.current_item is not None}")
         print(f"{'='*60}\n")
 
@@ -1368,15 +1851,13 @@ class App(ctk.CTk):
             # ✅ ISI current_scan_data untuk anti-duplicate
             self.current_scan_data["SCANER 1"] = code
 
-            self.current_item["scanner_1"] = {
-                "value": code,
-                "valid": None
-            }
+            self.current_item.scanner_1 = ScanResult(code)
 
             if not self.current_item_id:
-                self.current_item_id = int(time.time() * 1000) % 100000
+                self.current_item_id = self.current_item.item_id
 
             self._send_cmd(f"SCAN1:{self.current_item_id}:{code}")
+            self.result_tracker.scan_sent(self.current_item_id)
             print(f"✓ Scanner 1: {code}")
             print(f"   Item after scan: {self.current_item}")
 
@@ -1406,15 +1887,13 @@ class App(ctk.CTk):
             # ✅ ISI current_scan_data untuk anti-duplicate
             self.current_scan_data["SCANER 2"] = code
 
-            self.current_item["scanner_2"] = {
-                "value": code,
-                "valid": None
-            }
+            self.current_item.scanner_2 = ScanResult(code)
 
             if not self.current_item_id:
-                self.current_item_id = int(time.time() * 1000) % 100000
+                self.current_item_id = self.current_item.item_id
 
             self._send_cmd(f"SCAN2:{self.current_item_id}:{code}")
+            self.result_tracker.scan_sent(self.current_item_id)
             print(f"✓ Scanner 2: {code}")
             print(f"   Item after scan: {self.current_item}")
 
@@ -1444,15 +1923,13 @@ class App(ctk.CTk):
             # ✅ ISI current_scan_data untuk anti-duplicate
             self.current_scan_data["SCANER 3"] = code
 
-            self.current_item["scanner_3"] = {
-                "value": code,
-                "valid": None
-            }
+            self.current_item.scanner_3 = ScanResult(code)
 
             if not self.current_item_id:
-                self.current_item_id = int(time.time() * 1000) % 100000
+                self.current_item_id = self.current_item.item_id
 
             self._send_cmd(f"SCAN3:{self.current_item_id}:{code}")
+            self.result_tracker.scan_sent(self.current_item_id)
             print(f"✓ Scanner 3: {code}")
             print(f"   Item after scan: {self.current_item}")
 
@@ -1464,9 +1941,26 @@ class App(ctk.CTk):
     # ================== CLOSE ==================
 
     def on_close(self):
+        self._stop_live_upload(SHUTDOWN_TIMEOUT)
+        self.finish_retry.stop(SHUTDOWN_TIMEOUT)
+        self.session_store.close(SHUTDOWN_TIMEOUT)
+        self.api.close()
+
+        if self.db_inotify:
+            self.db_inotify.stop()
+        if self.db_delta_inotify:
+            self.db_delta_inotify.stop()
+
+        self.serial_supervisor.stop()
+        if self.evdev_input:
+            self.evdev_input.stop()
         if self.arduino and self.arduino.is_open:
             self._send_cmd("reset")
+            # Kirim sisa antrian (termasuk reset) sebelum port ditutup
+            self.serial_writer.close()
             time.sleep(0.5)
+            if self.serial_reader:
+                self.serial_reader.stop()
             self.arduino.close()
 
         self.destroy()
@@ -0,0 +1,118 @@
+"""
+Korelasi RESULT dari Arduino dengan keputusan PASS/FAIL yang dikirim GUI.
+
+Setiap item yang dikirim (SCANn:<id>:...) masuk tabel in-flight dengan
+item_id sebagai key. Saat test_pass / test_fail dikirim, waktu dan keputusan
+dicatat; RESULT:PASS:<id> / RESULT:FAIL:<id> dari Arduino menutup entry itu:
+
+- RESULT sama dengan keputusan   -> acked, round-trip dicatat
+- RESULT kebalikan keputusan     -> mismatch (diverter melakukan yang lain)
+- RESULT untuk id yang tidak ada -> unknown (terlambat / id salah)
+- tidak ada RESULT setelah ACK_TIMEOUT -> missing
+
+Round-trip = keputusan masuk antrian serial sampai RESULT diproses di Tk
+thread (GUI -> Arduino -> GUI). Semua method dipanggil dari Tk thread.
+"""
+
+import time
+from collections import OrderedDict
+
+from latency import latency_samples, percentile
+
+ACK_TIMEOUT = 5.0
+# Item yang discan tapi tidak pernah divalidasi (scan tidak lengkap) dibuang kalau tabel sebesar ini
+MAX_IN_FLIGHT = 1024
+
+
+class InFlightItem:
+    __slots__ = ("item_id", "scanned_at", "decision", "decided_at")
+
+    def __init__(self, item_id, scanned_at):
+        self.item_id = item_id
+        self.scanned_at = scanned_at
+        self.decision = None
+        self.decided_at = None
+
+
+class ResultTracker:
+    def __init__(self, ack_timeout=ACK_TIMEOUT, max_in_flight=MAX_IN_FLIGHT):
+        self.ack_timeout = ack_timeout
+        self.max_in_flight = max_in_flight
+
+        # item_id -> InFlightItem, urut waktu scan
+        self._in_flight = OrderedDict()
+        self.decisions = 0
+        self.acked = 0
+        self.mismatched = 0
+        self.missing = 0
+        self.unknown = 0
+        self.samples = latency_samples()
+
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    def scan_sent(self, item_id):
+        if item_id in self._in_flight:
+            return
+        self._in_flight[item_id] = InFlightItem(item_id, time.perf_counter())
+        if len(self._in_flight) > self.max_in_flight:
+            self._in_flight.popitem(last=False)
+
+    def decision_sent(self, item_id, decision):
+        """decision: "PASS" / "FAIL", dicatat saat test_pass / test_fail masuk antrian"""
+        entry = self._in_flight.get(item_id)
+        if entry is None:
+            entry = self._in_flight[item_id] = InFlightItem(item_id, time.perf_counter())
+        entry.decision = decision
+        entry.decided_at = time.perf_counter()
+        self.decisions += 1
+
+    def result_received(self, item_id, result):
+        """Return "ok", "mismatch" atau "unknown" untuk RESULT dari Arduino"""
+        entry = self._in_flight.get(item_id)
+        if entry is None or entry.decision is None:
+            self.unknown += 1
+            return "unknown"
+
+        del self._in_flight[item_id]
+        self.samples.append(time.perf_counter() - entry.decided_at)
+        if result != entry.decision:
+            self.mismatched += 1
+            return "mismatch"
+        self.acked += 1
+        return "ok"
+
+    def expire(self):
+        """Keputusan tanpa RESULT lebih lama dari ack_timeout -> missing; return list item_id"""
+        limit = time.perf_counter() - self.ack_timeout
+        expired = [
+            item_id for item_id, entry in self._in_flight.items()
+            if entry.decided_at is not None and entry.decided_at < limit
+        ]
+        for item_id in expired:
+            del self._in_flight[item_id]
+        self.missing += len(expired)
+        return expired
+
+    def reset(self):
+        """
+        Batch baru (item_id mulai lagi dari 1): kosongkan tabel in-flight supaya
+        RESULT terlambat dari batch lama tidak cocok dengan item batch baru.
+        Keputusan yang belum dapat RESULT dihitung missing; return list item_id-nya.
+        """
+        missing = [item_id for item_id, entry in self._in_flight.items() if entry.decision is not None]
+        self.missing += len(missing)
+        self._in_flight.clear()
+        return missing
+
+    def percentile(self, p):
+        return percentile(self.samples, p)
+
+    def summary(self):
+        return (
+            f"{self.decisions} decisions | acked {self.acked}, mismatch {self.mismatched}, "
+            f"missing {self.missing}, unknown {self.unknown}, in flight {self.in_flight} | round-trip "
+            f"p50 {self.percentile(0.5) * 1000:.1f} ms, p95 {self.percentile(0.95) * 1000:.1f} ms, "
+            f"p99 {self.percentile(0.99) * 1000:.1f} ms"
+        )
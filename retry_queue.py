@@ -0,0 +1,166 @@
+"""
+Retry finish batch di background dengan exponential backoff + jitter.
+
+Kalau /batch/{id}/finish gagal saat STOP, batch tidak dibuang: session store
+batch itu (durable, di disk) di-park dan dimasukkan ke FinishRetryQueue.
+Thread retry mencoba FinishUploader.upload() lagi sampai berhasil, dengan
+jeda backoff_delay() yang makin panjang. Setiap halaman dan finish membawa
+Idempotency-Key yang deterministik (batch + offset), jadi retry setelah
+timeout tidak menggandakan data di backend. Setelah restart, batch yang
+belum finish diambil lagi dari session store (pending_finish).
+"""
+
+import random
+import threading
+import time
+
+import requests
+
+from finish_upload import FinishUploadCancelled, FinishUploadError, FinishUploader
+
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 300.0
+# /batch/start: operator sedang menunggu, jadi jeda awal pendek
+START_RETRY_DELAY = 0.5
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Exponential backoff dengan jitter: antara separuh dan penuh dari base * 2^attempt"""
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def is_retryable_status(status_code):
+    """Error sementara di backend (overload / restart), aman diulang"""
+    return status_code == 429 or status_code >= 500
+
+
+def retry_request(send, attempts, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY, label="request"):
+    """
+    Panggil send() (mengirim request dengan Idempotency-Key yang sama) sampai
+    response-nya bukan error sementara atau percobaan habis. Return response
+    terakhir; kalau percobaan terakhir gagal koneksi, exception-nya di-raise.
+    """
+    for attempt in range(attempts):
+        if attempt:
+            delay = backoff_delay(attempt - 1, base, cap)
+            print(f"🔁 Retry {label} in {delay:.1f}s (attempt {attempt + 1}/{attempts})")
+            time.sleep(delay)
+
+        try:
+            response = send()
+        except requests.RequestException as e:
+            if attempt == attempts - 1:
+                raise
+            print(f"❌ {label} error: {e}")
+            continue
+
+        if not is_retryable_status(response.status_code) or attempt == attempts - 1:
+            return response
+        print(f"❌ {label} failed - {response.status_code}: {response.text}")
+
+
+class FinishRetryQueue:
+    def __init__(self, client, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+        self.client = client
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        # batch_record_id -> [store, attempts, waktu retry berikutnya (monotonic)]
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def pending(self):
+        with self._lock:
+            return list(self._entries)
+
+    def add(self, store, attempts=0):
+        """Jadwalkan finish untuk store ini; attempts = jumlah percobaan yang sudah gagal"""
+        delay = backoff_delay(attempts - 1, self.base_delay, self.max_delay) if attempts else 0.0
+        with self._lock:
+            if store.batch_record_id in self._entries:
+                store.close()
+                return
+            self._entries[store.batch_record_id] = [store, attempts, time.monotonic() + delay]
+        print(f"🔁 Batch {store.batch_record_id} queued for finish retry "
+              f"({store.uploaded}/{store.count} items uploaded, next try in {delay:.0f}s)")
+        self._wake.set()
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop thread retry; upload yang sedang jalan berhenti di batas halaman berikutnya"""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        alive = self._thread.is_alive()
+        self._thread = None
+        if alive:
+            # Store batch yang sedang dikirim masih dipakai thread itu, jangan ditutup
+            print(f"⚠ Finish retry still running after {timeout:.0f}s, not waiting")
+            return
+
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        for store, _, _ in entries.values():
+            store.close()
+
+    def _next_due(self):
+        """Return (batch_record_id yang sudah waktunya, detik sampai entry berikutnya)"""
+        now = time.monotonic()
+        with self._lock:
+            if not self._entries:
+                return None, None
+            batch_record_id, (_, _, due) = min(self._entries.items(), key=lambda kv: kv[1][2])
+        if due <= now:
+            return batch_record_id, 0.0
+        return None, due - now
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch_record_id, wait = self._next_due()
+            if batch_record_id is None:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            self._attempt(batch_record_id)
+
+    def _attempt(self, batch_record_id):
+        with self._lock:
+            store, attempts, _ = self._entries[batch_record_id]
+        uploaded = store.uploaded
+
+        try:
+            FinishUploader(self.client, store).upload(self._stop)
+        except FinishUploadCancelled:
+            return
+        except Exception as e:
+            # Error apa pun (mis. sqlite3.Error dari store) dijadwalkan ulang,
+            # thread retry tidak boleh mati
+            if not isinstance(e, (FinishUploadError, requests.RequestException)):
+                e = f"{type(e).__name__}: {e}"
+            if store.uploaded > uploaded:
+                # Backend hidup lagi (ada halaman yang diterima): mulai backoff dari awal
+                attempts = 0
+            delay = backoff_delay(attempts, self.base_delay, self.max_delay)
+            with self._lock:
+                self._entries[batch_record_id] = [store, attempts + 1, time.monotonic() + delay]
+            print(f"⚠ Finish retry batch {batch_record_id} failed (attempt {attempts + 1}), "
+                  f"next in {delay:.0f}s: {e}")
+            return
+
+        store.finish()
+        with self._lock:
+            del self._entries[batch_record_id]
+        print(f"✅ BATCH FINISH SUCCESS (retry) - Record ID: {batch_record_id}, {store.count} items")
@@ -0,0 +1,357 @@
+"""
+Scanner database (~/scanner-db.json) dalam format internal GUI.
+
+Data disimpan per kolom scanner ("SCANER 1/2/3"), masing-masing dengan
+index sendiri sehingga validasi per-scanner selalu O(1), tidak tergantung
+jumlah baris DB. File JSON dibaca secara streaming, baris mentah tidak
+pernah disimpan.
+
+Perubahan kecil dari upstream bisa ditulis ke sidecar scanner-db.delta.jsonl
+(append-only) dan diterapkan per baris tanpa membaca ulang seluruh DB.
+"""
+
+import json
+import os
+import re
+
+from bloom import DEFAULT_FP_RATE, BloomFilter, PrefilterStats
+
+SCANNER_KEYS = ("SCANER 1", "SCANER 2", "SCANER 3")
+
+# Kolom anchor untuk composite index (validasi konsistensi per baris)
+ROW_KEY = "SCANER 1"
+
+# Mapping key file JSON -> key internal GUI
+SOURCE_KEYS = {
+    "SCANER 1": "Scanner 1",
+    "SCANER 2": "Scanner 2",
+    "SCANER 3": "Scanner 3",
+}
+
+READ_CHUNK_SIZE = 1 << 16
+
+# Sidecar append-only berisi perubahan di atas scanner-db.json
+DELTA_SUFFIX = ".delta.jsonl"
+DELTA_OPS = ("add", "remove")
+# Byte awal delta yang ikut jadi identitas file (inode bisa dipakai ulang)
+DELTA_HEAD_BYTES = 64
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Karakter yang pasti mengakhiri sebuah value JSON di dalam array
+_VALUE_TERMINATORS = ",] \t\n\r"
+
+
+def normalize_row(row):
+    """Convert one raw JSON row to the internal "SCANER n" format"""
+    return {key: row.get(src) for key, src in SOURCE_KEYS.items()}
+
+
+def delta_path(db_path):
+    """~/scanner-db.json -> ~/scanner-db.delta.jsonl"""
+    return os.path.splitext(db_path)[0] + DELTA_SUFFIX
+
+
+def delta_identity(path, offset):
+    """
+    Identitas file delta yang sudah diterapkan sampai offset: (dev, inode, byte awal).
+    Delta yang diganti (rename / dihapus lalu ditulis ulang) punya identitas lain
+    walaupun ukurannya sama atau lebih besar. None kalau file tidak ada.
+    """
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            head = f.read(min(offset, DELTA_HEAD_BYTES))
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino, head
+
+
+def iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield elements of a top-level JSON array one by one.
+
+    File dibaca per chunk, jadi memory yang dipakai sebanding dengan ukuran
+    satu elemen, bukan ukuran file.
+    """
+    scan_once = json.JSONDecoder().scan_once
+    skip_ws = _WHITESPACE.match
+    buf = f.read(chunk_size)
+    eof = not buf
+    pos = 0
+    expect = "open"
+
+    while True:
+        pos = skip_ws(buf, pos).end()
+
+        if pos == len(buf):
+            if eof:
+                raise ValueError("Unexpected end of file inside JSON array")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = chunk, 0
+            continue
+
+        ch = buf[pos]
+
+        if expect == "open":
+            if ch != "[":
+                raise ValueError("Database file must contain a JSON array")
+            pos += 1
+            expect = "first"
+            continue
+
+        if expect != "value" and ch == "]":
+            return
+
+        if expect == "sep":
+            if ch != ",":
+                raise ValueError(f"Expected ',' or ']', got {ch!r}")
+            pos += 1
+            expect = "value"
+            continue
+
+        try:
+            value, end = scan_once(buf, pos)
+            complete = end < len(buf) and buf[end] in _VALUE_TERMINATORS
+        except (StopIteration, ValueError):
+            complete = False
+
+        # Value terpotong di batas chunk -> baca lagi lalu ulangi decode
+        if not complete:
+            if eof:
+                raise ValueError("Invalid JSON value in database file")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        yield value
+        pos = end
+        expect = "sep"
+
+
+class DeltaMixin:
+    """apply_delta untuk class DB yang punya add_raw / remove_raw"""
+
+    def apply_delta(self, path, offset=0):
+        """
+        Apply delta file (satu JSON object per baris, {"op": "add"|"remove", "Scanner n": ...})
+        mulai dari byte offset. Baris terakhir yang belum lengkap dilewati,
+        baris rusak di-log lalu dilewati supaya delta tidak macet di baris itu.
+
+        Return (offset baru, jumlah add, jumlah remove).
+        """
+        added = removed = 0
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+
+        end = data.rfind(b"\n") + 1
+        line_offset = offset
+        for line in data[:end].split(b"\n")[:-1]:
+            line_start, line_offset = line_offset, line_offset + len(line) + 1
+            if not line.strip():
+                continue
+
+            try:
+                op = json.loads(line)
+            except ValueError as e:
+                print(f"⚠ Skipping malformed delta line at byte {line_start}: {e}")
+                continue
+            if not isinstance(op, dict):
+                print(f"⚠ Skipping delta line at byte {line_start}: not a JSON object")
+                continue
+            kind = op.get("op")
+            if kind not in DELTA_OPS:
+                print(f"⚠ Skipping delta line at byte {line_start}: unknown op {kind!r}")
+                continue
+            if not any(op.get(src) for src in SOURCE_KEYS.values()):
+                print(f"⚠ Skipping delta line at byte {line_start}: no scanner codes")
+                continue
+
+            if kind == "remove":
+                removed += self.remove_raw(op)
+            else:
+                self.add_raw(op)
+                added += 1
+
+        return offset + end, added, removed
+
+
+class ScannerDatabase(DeltaMixin):
+    def __init__(self, entries=None):
+        # Kolom per scanner (urut sesuai baris) + index untuk lookup.
+        # Index menyimpan jumlah baris per value supaya remove dari delta benar.
+        self.columns = {key: [] for key in SCANNER_KEYS}
+        self.index = {key: {} for key in SCANNER_KEYS}
+
+        # Baris yang dihapus lewat delta: (s1, s2, s3) -> jumlah.
+        # Kolom baru dipadatkan lagi saat full reload berikutnya.
+        self.removed = {}
+        self.removed_count = 0
+
+        # Composite index: kode scanner 1 -> row id (atau list row id kalau
+        # kodenya dobel), dipakai untuk cek scanner 2/3 dari baris yang sama
+        self.rows = {}
+
+        # Bloom filter per kolom (opsional, lihat enable_prefilter)
+        self.prefilters = None
+        self.prefilter_stats = None
+
+        for entry in entries or []:
+            self.add(entry)
+
+    @classmethod
+    def from_raw(cls, raw_rows):
+        """Build database from raw rows as stored in scanner-db.json"""
+        db = cls()
+        add_raw = db.add_raw
+        for row in raw_rows:
+            add_raw(row)
+        return db
+
+    @classmethod
+    def load(cls, path):
+        """Stream scanner-db.json straight into per-column storage"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_raw(iter_json_array(f))
+
+    def add(self, entry):
+        """Add a row already in the internal "SCANER n" format"""
+        self.add_raw({src: entry.get(key) for key, src in SOURCE_KEYS.items()})
+
+    def add_raw(self, row):
+        """Add a row in the scanner-db.json ("Scanner n") format"""
+        get = row.get
+        columns = self.columns
+        index = self.index
+
+        # Baris tanpa kode scanner 1 disimpan di key None (hanya untuk remove_raw)
+        anchor = get(SOURCE_KEYS[ROW_KEY]) or None
+        row_id = len(columns[ROW_KEY])
+        existing = self.rows.get(anchor)
+        if existing is None:
+            self.rows[anchor] = row_id
+        elif isinstance(existing, list):
+            existing.append(row_id)
+        else:
+            self.rows[anchor] = [existing, row_id]
+
+        for key, src in SOURCE_KEYS.items():
+            value = get(src)
+            columns[key].append(value)
+            if value:
+                column = index[key]
+                column[value] = column.get(value, 0) + 1
+                if self.prefilters is not None and isinstance(value, str):
+                    self.prefilters[key].add(value)
+
+    def enable_prefilter(self, fp_rate=DEFAULT_FP_RATE):
+        """Build Bloom filter per kolom scanner dari index yang sudah ada"""
+        self.prefilters = {}
+        for key in SCANNER_KEYS:
+            column = self.index[key]
+            # Ruang lebih untuk baris yang masuk lewat delta
+            bloom = BloomFilter.for_capacity(len(column) + len(column) // 10 + 1000, fp_rate)
+            for value in column:
+                if isinstance(value, str):
+                    bloom.add(value)
+            self.prefilters[key] = bloom
+        self.prefilter_stats = PrefilterStats(SCANNER_KEYS)
+
+    def remove_raw(self, row) -> bool:
+        """
+        Remove a row in the scanner-db.json format. Return False kalau
+        baris tersebut tidak ada di DB.
+        """
+        wanted = tuple(row.get(SOURCE_KEYS[key]) or None for key in SCANNER_KEYS)
+        if not any(wanted):
+            return False
+
+        # Baris persis (s1, s2, s3) harus ada dan belum di-remove semua;
+        # cek per value saja bisa menghapus gabungan value dari baris berbeda
+        row_ids = self.rows.get(wanted[0])
+        if row_ids is None:
+            return False
+        if not isinstance(row_ids, list):
+            row_ids = (row_ids,)
+
+        columns = [self.columns[key] for key in SCANNER_KEYS]
+        matched = {}
+        for row_id in row_ids:
+            stored = tuple(column[row_id] for column in columns)
+            if tuple(value or None for value in stored) == wanted:
+                matched[stored] = matched.get(stored, 0) + 1
+
+        values = next((stored for stored, n in matched.items() if n > self.removed.get(stored, 0)), None)
+        if values is None:
+            return False
+
+        for key, value in zip(SCANNER_KEYS, values):
+            if value:
+                column = self.index[key]
+                if column[value] > 1:
+                    column[value] -= 1
+                else:
+                    del column[value]
+
+        self.removed[values] = self.removed.get(values, 0) + 1
+        self.removed_count += 1
+        return True
+
+    def contains(self, scanner_key, value) -> bool:
+        """Check whether value exists in the given scanner column"""
+        column = self.index.get(scanner_key)
+        if column is None:
+            return False
+
+        if self.prefilters is None or not isinstance(value, str):
+            return value in column
+
+        if value not in self.prefilters[scanner_key]:
+            self.prefilter_stats.record(scanner_key, False)
+            return False
+
+        found = value in column
+        self.prefilter_stats.record(scanner_key, True, found)
+        return found
+
+    def row_matches(self, values):
+        """
+        Check whether the given codes ({"SCANER n": code}) come from one DB row.
+        Kode None/kosong diabaikan. Return None kalau kode scanner 1 tidak ada.
+        """
+        anchor = values.get(ROW_KEY)
+        if not anchor:
+            return None
+
+        row_ids = self.rows.get(anchor)
+        if row_ids is None:
+            return False
+        if not isinstance(row_ids, list):
+            row_ids = (row_ids,)
+
+        columns = self.columns
+        others = [(columns[key], value) for key, value in values.items() if key != ROW_KEY and value]
+
+        matched = {}
+        for row_id in row_ids:
+            if all(column[row_id] == value for column, value in others):
+                row = tuple(columns[key][row_id] for key in SCANNER_KEYS)
+                matched[row] = matched.get(row, 0) + 1
+
+        # Baris yang sudah di-remove lewat delta tidak dihitung
+        return any(n > self.removed.get(row, 0) for row, n in matched.items())
+
+    def __len__(self):
+        return len(self.columns[SCANNER_KEYS[0]]) - self.removed_count
+
+    def __iter__(self):
+        removed = dict(self.removed)
+        for values in zip(*(self.columns[key] for key in SCANNER_KEYS)):
+            if removed.get(values):
+                removed[values] -= 1
+                continue
+            yield dict(zip(SCANNER_KEYS, values))
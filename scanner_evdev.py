@@ -0,0 +1,225 @@
+"""
+Backend input scanner per device lewat Linux evdev (/dev/input/event*), opsional.
+
+Dengan bind_all("<KeyPress>") ketiga scanner mengetik ke satu buffer dan
+_identify_scanner menebak sumbernya dari panjang / prefix kode. Kalau dua
+scanner membaca hampir bersamaan, karakternya bercampur dan kedua kode
+hilang. Di sini setiap scanner dibaca dari device evdev-nya sendiri
+(struct input_event langsung dari kernel, tanpa paket tambahan), di-grab
+(EVIOCGRAB) supaya ketikannya tidak ikut masuk ke bind_all, dan punya
+ScannerInput sendiri, jadi kode dari scanner 1/2/3 tidak pernah tercampur.
+
+Satu thread membaca semua device dengan select(); tombol dikumpulkan dan
+dikirim ke Tk thread dalam satu after(0) per burst (seperti SerialReader).
+
+Device diatur lewat env BCA_SCANNER_DEVICES, mis.
+    1=/dev/input/by-id/usb-Honeywell_1900-event-kbd,3=/dev/input/event7
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+from collections import deque
+
+EV_KEY = 0x01
+KEY_RELEASE = 0
+# _IOW('E', 0x90, int): akses eksklusif, event tidak diteruskan ke X / Tk
+EVIOCGRAB = 0x40044590
+
+# struct input_event: timeval (long, long), type (u16), code (u16), value (s32)
+_EVENT = struct.Struct("llHHi")
+READ_EVENTS = 64
+
+KEY_ENTER = 28
+KEY_KPENTER = 96
+_SHIFT_KEYS = (42, 54)
+
+_ROWS = (
+    (2, "1234567890-=", "!@#$%^&*()_+"),
+    (16, "qwertyuiop[]", "QWERTYUIOP{}"),
+    (30, "asdfghjkl;'`", 'ASDFGHJKL:"~'),
+    (43, "\\zxcvbnm,./", "|ZXCVBNM<>?"),
+)
+_KEYPAD = {55: "*", 71: "7", 72: "8", 73: "9", 74: "-", 75: "4", 76: "5", 77: "6", 78: "+",
+           79: "1", 80: "2", 81: "3", 82: "0", 83: ".", 98: "/"}
+
+# keycode -> (karakter, karakter dengan shift), layout US
+KEYMAP = {57: (" ", " ")}
+for _first, _normal, _shifted in _ROWS:
+    for _offset, (_n, _s) in enumerate(zip(_normal, _shifted)):
+        KEYMAP[_first + _offset] = (_n, _s)
+KEYMAP.update({code: (ch, ch) for code, ch in _KEYPAD.items()})
+
+ENTER = "\n"
+
+
+def parse_device_map(spec):
+    """"1=/dev/input/event5,3=/dev/input/event7" -> {"scanner1": path, "scanner3": path}"""
+    devices = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        number, sep, path = part.partition("=")
+        if not sep or number.strip() not in ("1", "2", "3") or not path.strip():
+            print(f"⚠ Invalid scanner device mapping ignored: '{part}'")
+            continue
+        devices[f"scanner{number.strip()}"] = path.strip()
+    return devices
+
+
+class KeyDecoder:
+    """Byte input_event dari satu device -> list (karakter atau ENTER, waktu event)"""
+
+    def __init__(self):
+        self.shift = False
+        self._partial = b""
+
+    def feed(self, data: bytes):
+        data = self._partial + data
+        usable = len(data) - len(data) % _EVENT.size
+        self._partial = data[usable:]
+
+        keys = []
+        for sec, usec, ev_type, code, value in _EVENT.iter_unpack(data[:usable]):
+            if ev_type != EV_KEY:
+                continue
+            if code in _SHIFT_KEYS:
+                self.shift = value != KEY_RELEASE
+            elif value == KEY_RELEASE:
+                continue
+            elif code in (KEY_ENTER, KEY_KPENTER):
+                keys.append((ENTER, sec + usec / 1e6))
+            elif code in KEYMAP:
+                keys.append((KEYMAP[code][self.shift], sec + usec / 1e6))
+        return keys
+
+
+def _set_grab(fd, grab):
+    # fcntl hanya ada di Unix: diimpor di sini supaya main.py tetap bisa
+    # diimpor di Windows / macOS (fallback ke keyboard-wedge bind_all)
+    import fcntl
+
+    fcntl.ioctl(fd, EVIOCGRAB, int(grab))
+
+
+class EvdevScannerInput:
+    """
+    devices  : {"scanner1": path device, ...}
+    engines  : {"scanner1": ScannerInput, ...}, dipanggil di Tk thread
+    schedule : menjadwalkan callback di Tk thread, mis. lambda cb: app.after(0, cb)
+    grab     : EVIOCGRAB supaya tombol scanner tidak ikut masuk ke bind_all
+    """
+
+    def __init__(self, devices, engines, schedule, grab=True):
+        self.devices = devices
+        self.engines = engines
+        self.schedule = schedule
+        self.grab = grab
+
+        # fd -> (scanner_key, KeyDecoder)
+        self._fds = {}
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._dispatch_scheduled = False
+        self._wake_r = None
+        self._wake_w = None
+        self._thread = None
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith("linux") and os.path.isdir("/dev/input")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Buka dan grab semua device; return False kalau tidak ada yang bisa dibuka"""
+        if self.running:
+            return True
+
+        for scanner_key, path in self.devices.items():
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+            except OSError as e:
+                print(f"❌ Cannot open {scanner_key} device {path}: {e}")
+                continue
+            if self.grab:
+                try:
+                    _set_grab(fd, True)
+                except OSError as e:
+                    print(f"⚠ Cannot grab {path} ({e}), keys may also reach the window")
+            self._fds[fd] = (scanner_key, KeyDecoder())
+            print(f"⌨ {scanner_key} reading from {path}")
+
+        if not self._fds:
+            return False
+
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        if self._thread:
+            os.write(self._wake_w, b"x")
+            self._thread.join(timeout=1)
+            self._thread = None
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+
+        for fd in list(self._fds):
+            self._close(fd)
+
+    def _close(self, fd):
+        del self._fds[fd]
+        if self.grab:
+            try:
+                _set_grab(fd, False)
+            except OSError:
+                pass
+        os.close(fd)
+
+    def _read_loop(self):
+        while self._fds:
+            readable, _, _ = select.select(list(self._fds) + [self._wake_r], [], [])
+            if self._wake_r in readable:
+                return
+
+            batch = []
+            for fd in readable:
+                scanner_key, decoder = self._fds[fd]
+                try:
+                    data = os.read(fd, _EVENT.size * READ_EVENTS)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    # Device dicabut: scanner lain tetap jalan
+                    print(f"❌ {scanner_key} device error: {e}")
+                    self._close(fd)
+                    continue
+                batch.extend((scanner_key, ch, stamp) for ch, stamp in decoder.feed(data))
+
+            if batch:
+                self._enqueue(batch)
+
+    def _enqueue(self, batch):
+        with self._lock:
+            self._pending.extend(batch)
+            if self._dispatch_scheduled:
+                return
+            self._dispatch_scheduled = True
+        self.schedule(self._dispatch)
+
+    def _dispatch(self):
+        """Dipanggil di Tk thread: teruskan tombol ke ScannerInput scanner masing-masing"""
+        with self._lock:
+            batch, self._pending = self._pending, deque()
+            self._dispatch_scheduled = False
+
+        for scanner_key, ch, stamp in batch:
+            engine = self.engines[scanner_key]
+            if ch == ENTER:
+                engine.enter()
+            else:
+                engine.key(ch, stamp)
@@ -0,0 +1,185 @@
+"""
+Engine input scanner keyboard-wedge: pisahkan burst scanner dari ketikan
+manusia berdasarkan jarak antar tombol, dan akhiri kode secara adaptif.
+
+Sebelumnya on_key menambah karakter ke self.buffer lalu _schedule_flush(120)
+membatalkan dan membuat ulang job after() di setiap tombol (after_cancel +
+after per karakter), dan kode tanpa Return selalu menunggu 120 ms diam.
+
+Di sini:
+- Jarak antar tombol dirata-rata (EWMA). Kalau sudah MIN_SCANNER_KEYS tombol
+  dengan jarak <= SCANNER_MAX_GAP, buffer dianggap burst scanner dan kode
+  berakhir setelah IDLE_FACTOR x jarak rata-rata (min IDLE_MIN, 70 ms supaya
+  jitter USB / HID di tengah burst tidak memotong kode). Ketikan manusia tetap
+  memakai IDLE_MAX (120 ms, sama seperti dulu).
+- Jarak antar tombol diambil dari waktu event (event.time), bukan waktu
+  handler dipanggil, jadi Tk yang sempat sibuk tidak mengubah klasifikasi.
+  Tombol yang datang setelah batas idle kode sebelumnya langsung mengakhiri
+  kode itu (dua kode berurutan tanpa Return tidak tergabung).
+- Hanya ada satu timer: tombol baru cukup memundurkan deadline; timer yang
+  jalan lebih awal menjadwalkan sisa waktunya sendiri. Timer dibatalkan hanya
+  kalau deadline maju (buffer baru dikenali sebagai burst scanner).
+
+Semua method dipanggil di Tk thread (atau thread lain yang sama untuk satu engine).
+"""
+
+import time
+
+from latency import latency_samples, percentile
+
+# Jarak antar tombol scanner USB HID biasanya 1-15 ms; manusia >= 50 ms
+SCANNER_MAX_GAP = 0.03
+MIN_SCANNER_KEYS = 4
+IDLE_FACTOR = 4
+# Jeda sesaat 30-50 ms di tengah burst (polling USB, host sibuk) masih satu kode
+IDLE_MIN = 0.07
+IDLE_MAX = 0.12
+GAP_SMOOTHING = 0.5
+
+END_RETURN = "return"
+END_IDLE = "idle"
+END_GAP = "gap"
+
+
+class InputStats:
+    """Kode per jenis (scanner / ketik) dan cara berakhir, timer Tk, latency capture"""
+
+    def __init__(self):
+        self.keys = 0
+        self.codes = 0
+        self.scanner_codes = 0
+        self.typed_codes = 0
+        self.ended = {END_RETURN: 0, END_IDLE: 0, END_GAP: 0}
+        self.timer_calls = 0
+        # tombol pertama -> kode diproses, dan tombol terakhir -> kode diproses
+        self.capture = latency_samples()
+        self.end_delay = latency_samples()
+
+    def summary(self):
+        timers = self.timer_calls / self.codes if self.codes else 0.0
+        return (
+            f"{self.codes} codes ({self.scanner_codes} scanner, {self.typed_codes} typed), {self.keys} keys | "
+            f"ended by return {self.ended[END_RETURN]}, idle {self.ended[END_IDLE]}, gap {self.ended[END_GAP]} | "
+            f"{timers:.1f} timer calls/code | capture p50 {percentile(self.capture, 0.5) * 1000:.1f} ms, "
+            f"p99 {percentile(self.capture, 0.99) * 1000:.1f} ms | end delay p50 "
+            f"{percentile(self.end_delay, 0.5) * 1000:.1f} ms, p99 {percentile(self.end_delay, 0.99) * 1000:.1f} ms"
+        )
+
+
+class ScannerInput:
+    """
+    schedule : schedule(delay_ms, callback) -> job, mis. app.after
+    cancel   : cancel(job), mis. app.after_cancel
+    on_code  : dipanggil dengan kode lengkap (str)
+    """
+
+    def __init__(self, schedule, cancel, on_code, clock=time.perf_counter):
+        self.schedule = schedule
+        self.cancel = cancel
+        self.on_code = on_code
+        self.clock = clock
+        self.stats = InputStats()
+
+        self._chars = []
+        self._first_at = 0.0
+        self._last_at = 0.0
+        self._last_stamp = 0.0
+        self._idle = IDLE_MAX
+        self._gap = 0.0
+        self._fast_keys = 0
+        self._deadline = 0.0
+        self._timer = None
+        self._timer_due = 0.0
+
+    @property
+    def buffer(self):
+        return "".join(self._chars)
+
+    @property
+    def is_scanner_burst(self):
+        return self._fast_keys >= MIN_SCANNER_KEYS - 1 and self._gap <= SCANNER_MAX_GAP
+
+    def key(self, ch, timestamp=None):
+        """Satu karakter printable; timestamp = waktu event dalam detik (event.time / 1000)"""
+        now = self.clock()
+        stamp = now if timestamp is None else timestamp
+        self.stats.keys += 1
+
+        if self._chars:
+            gap = stamp - self._last_stamp
+            if gap < 0 or gap > self._idle:
+                # Kode sebelumnya sudah selesai, hanya timer-nya belum sempat jalan (Tk sibuk)
+                self._finish(END_GAP, now)
+            else:
+                self._gap = gap if len(self._chars) == 1 else (
+                    GAP_SMOOTHING * gap + (1 - GAP_SMOOTHING) * self._gap)
+                if gap <= SCANNER_MAX_GAP:
+                    self._fast_keys += 1
+
+        if not self._chars:
+            self._first_at = now
+            self._gap = 0.0
+            self._fast_keys = 0
+        self._chars.append(ch)
+        self._last_at = now
+        self._last_stamp = stamp
+
+        if self.is_scanner_burst:
+            self._idle = min(IDLE_MAX, max(IDLE_MIN, IDLE_FACTOR * self._gap))
+        else:
+            self._idle = IDLE_MAX
+        self._deadline = now + self._idle
+
+        if self._timer is not None and self._timer_due > self._deadline + 0.001:
+            # Deadline maju (baru dikenali sebagai scanner): timer lama terlalu lambat
+            self.cancel(self._timer)
+            self.stats.timer_calls += 1
+            self._timer = None
+        if self._timer is None:
+            self._arm(now)
+
+    def enter(self):
+        """Return / Enter: akhiri kode sekarang"""
+        if self._chars:
+            self._finish(END_RETURN, self.clock())
+
+    def _arm(self, now):
+        delay = max(0.0, self._deadline - now)
+        self._timer_due = now + delay
+        self._timer = self.schedule(max(1, round(delay * 1000)), self._on_timer)
+        self.stats.timer_calls += 1
+
+    def _on_timer(self):
+        self._timer = None
+        if not self._chars:
+            return
+        now = self.clock()
+        if now + 0.001 >= self._deadline:
+            self._finish(END_IDLE, now)
+        else:
+            # Ada tombol baru sejak timer dibuat: tunggu sisa waktunya
+            self._arm(now)
+
+    def _finish(self, reason, now):
+        if self._timer is not None:
+            self.cancel(self._timer)
+            self.stats.timer_calls += 1
+            self._timer = None
+
+        code = "".join(self._chars)
+        scanner = self.is_scanner_burst
+        first_at, last_at = self._first_at, self._last_at
+        self._chars = []
+
+        stats = self.stats
+        stats.codes += 1
+        if scanner:
+            stats.scanner_codes += 1
+        else:
+            stats.typed_codes += 1
+        stats.ended[reason] += 1
+        # Kode yang diakhiri tombol berikutnya: end delay = jarak sampai tombol itu
+        stats.capture.append(now - first_at)
+        stats.end_delay.append(now - last_at)
+
+        self.on_code(code)
@@ -0,0 +1,561 @@
+"""
+Engine I/O serial Arduino.
+
+SerialReader: baca byte yang tersedia, framing baris sendiri, dan kirim
+burst baris ke Tk thread dalam satu callback.
+
+Sebelumnya _serial_reader memanggil readline() (timeout 1 detik) lalu
+self.after(0, ...) untuk setiap baris. Di sini thread reader membaca semua
+byte yang sudah ada di buffer UART sekaligus (in_waiting), memotongnya jadi
+baris, dan menaruhnya di antrian. Selama callback dispatch sebelumnya belum
+jalan, baris baru cukup ditambahkan ke antrian yang sama, jadi satu burst =
+satu callback Tk. Latency setiap baris (dari byte diterima sampai handler
+dipanggil) dicatat di SerialStats.
+
+SerialWriter: _send_cmd hanya memasukkan perintah ke antrian (bounded);
+write() + flush() (menunggu UART kosong) dijalankan thread writer, jadi Tk
+thread tidak ikut menunggu. Urutan perintah tetap FIFO (SCANn, PASS/FAIL,
+start/stop), hanya poll "status" yang belum terkirim yang digabung.
+
+wait_ready: pengganti time.sleep(2) setelah port dibuka (menunggu auto-reset
+Arduino). Port dikirimi probe berkala sampai firmware mengirim baris pertama
+(banner boot / balasan status); dijalankan di thread connect, bukan Tk thread.
+
+SerialSupervisor: scan list_ports dan connect di thread sendiri; kalau read /
+write gagal (adapter USB dicabut), port dibuka lagi dengan backoff. Perintah
+yang belum terkirim tetap di antrian SerialWriter dan dikirim setelah
+reconnect (kecuali yang sudah lebih tua dari REPLAY_MAX_AGE). Keputusan
+test_pass / test_fail hanya di-replay selama item masih mungkin di depan
+diverter (decision_max_age); yang lebih tua dibuang dan dilaporkan.
+"""
+
+import threading
+import time
+from collections import deque
+
+from latency import latency_samples, percentile
+
+# Timeout read pendek supaya thread cepat berhenti saat port ditutup
+READ_TIMEOUT = 0.05
+# Baris tanpa newline sepanjang ini dianggap sampah (noise / baud salah)
+MAX_LINE_LENGTH = 4096
+WRITE_QUEUE_SIZE = 256
+# Kalau antrian penuh, Tk thread menunggu paling lama ini sebelum perintah dibuang
+WRITE_FULL_TIMEOUT = 0.1
+# Perintah yang cukup dikirim sekali walaupun diminta berkali-kali
+COALESCE_COMMANDS = frozenset({"status"})
+# Bootloader Arduino biasanya selesai < 2 detik setelah DTR reset
+READY_TIMEOUT = 3.0
+READY_PROBE_INTERVAL = 0.5
+# Perintah (status, start/stop, SCANn) yang antri selama putus lebih tua dari ini sudah basi
+REPLAY_MAX_AGE = 30.0
+# Keputusan diverter: item sudah lewat diverter setelah kira-kira waktu transit belt
+DECISION_COMMANDS = frozenset({"test_pass", "test_fail"})
+DECISION_REPLAY_MAX_AGE = 2.0
+# Scan list_ports murah: port yang belum muncul dicek lagi dengan interval tetap
+RESCAN_INTERVAL = 0.25
+# Port ada tapi gagal dibuka / handshake: backoff
+RECONNECT_BASE_DELAY = 0.5
+RECONNECT_MAX_DELAY = 5.0
+
+
+def wait_ready(port, framer, probe, timeout=READY_TIMEOUT, probe_interval=READY_PROBE_INTERVAL):
+    """
+    Tunggu firmware siap: kirim probe setiap probe_interval sampai ada baris
+    masuk. Return baris yang sudah terbaca ([] kalau timeout). Byte sisa
+    tetap di framer, jadi framer yang sama harus dipakai SerialReader.
+    """
+    port.timeout = READ_TIMEOUT
+    deadline = time.monotonic() + timeout
+    next_probe = 0.0
+    while True:
+        now = time.monotonic()
+        if now >= deadline:
+            return []
+        if now >= next_probe:
+            port.write(probe)
+            next_probe = now + probe_interval
+
+        data = port.read(port.in_waiting or 1)
+        if data:
+            lines = framer.feed(data)
+            if lines:
+                return lines
+
+
+class LineFramer:
+    """Potong stream byte jadi baris (\\n, \\r\\n) tanpa kehilangan sisa baris"""
+
+    def __init__(self, max_line_length=MAX_LINE_LENGTH):
+        self.max_line_length = max_line_length
+        self._partial = bytearray()
+        self.dropped = 0
+
+    def feed(self, data: bytes):
+        """Return list baris lengkap (str, sudah di-strip) dari data ini"""
+        self._partial += data
+        if b"\n" not in data:
+            if len(self._partial) > self.max_line_length:
+                self._partial.clear()
+                self.dropped += 1
+            return []
+
+        *lines, rest = self._partial.split(b"\n")
+        self._partial = bytearray(rest)
+
+        result = []
+        for raw in lines:
+            line = raw.decode(errors="ignore").strip()
+            if line:
+                result.append(line)
+        return result
+
+
+class SerialStats:
+    """Latency UART -> handler dan jumlah dispatch Tk per baris"""
+
+    def __init__(self):
+        self.lines = 0
+        self.dispatches = 0
+        self.bytes = 0
+        self.reads = 0
+        self.samples = latency_samples()
+
+    def percentile(self, p):
+        return percentile(self.samples, p)
+
+    def summary(self):
+        per_dispatch = self.lines / self.dispatches if self.dispatches else 0.0
+        return (
+            f"{self.lines} lines, {self.bytes} bytes in {self.reads} reads | "
+            f"{self.dispatches} Tk dispatches ({per_dispatch:.1f} lines each) | latency "
+            f"p50 {self.percentile(0.5) * 1000:.2f} ms, p99 {self.percentile(0.99) * 1000:.2f} ms, "
+            f"max {max(self.samples, default=0.0) * 1000:.2f} ms"
+        )
+
+
+class SerialReader:
+    """
+    port     : objek serial.Serial yang sudah terbuka
+    handler  : dipanggil di Tk thread untuk setiap baris, handler(line)
+    schedule : menjadwalkan callback di Tk thread, mis. lambda cb: app.after(0, cb)
+    on_error : dipanggil (di Tk thread) sekali kalau read gagal / port tertutup
+    framer   : decoder stream -> baris (LineFramer untuk teks, FrameDecoder untuk biner)
+    """
+
+    def __init__(self, port, handler, schedule, on_error=None, framer=None):
+        self.port = port
+        self.handler = handler
+        self.schedule = schedule
+        self.on_error = on_error
+
+        self.framer = framer or LineFramer()
+        self.stats = SerialStats()
+
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._dispatch_scheduled = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.port.timeout = READ_TIMEOUT
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def _read_loop(self):
+        port = self.port
+        stats = self.stats
+        while not self._stop.is_set():
+            try:
+                # Blok sampai ada byte pertama (maks READ_TIMEOUT), lalu ambil semua yang sudah ada
+                data = port.read(port.in_waiting or 1)
+            except Exception as e:
+                if not self._stop.is_set():
+                    print(f"❌ Serial read error: {e}")
+                    if self.on_error:
+                        # e tidak bisa dipakai di lambda setelah blok except selesai
+                        error = e
+                        self.schedule(lambda: self.on_error(error))
+                return
+
+            if not data:
+                continue
+            arrived = time.perf_counter()
+            stats.reads += 1
+            stats.bytes += len(data)
+
+            lines = self.framer.feed(data)
+            if lines:
+                self._enqueue(lines, arrived)
+
+    def _enqueue(self, lines, arrived):
+        with self._lock:
+            self._pending.extend((line, arrived) for line in lines)
+            if self._dispatch_scheduled:
+                return
+            self._dispatch_scheduled = True
+        self.schedule(self._dispatch)
+
+    def _dispatch(self):
+        """Dipanggil di Tk thread: proses semua baris yang terkumpul"""
+        with self._lock:
+            batch, self._pending = self._pending, deque()
+            self._dispatch_scheduled = False
+
+        stats = self.stats
+        stats.dispatches += 1
+        for line, arrived in batch:
+            try:
+                self.handler(line)
+            except Exception as e:
+                print(f"❌ Serial handler error on '{line}': {e}")
+            stats.lines += 1
+            stats.samples.append(time.perf_counter() - arrived)
+
+
+class WriterStats:
+    """Back-pressure antrian writer: kedalaman, coalesce, drop, latency antri -> UART"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.written = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.replayed = 0
+        self.expired = 0
+        self.stale_decisions = 0
+        self.writes = 0
+        self.max_depth = 0
+        self.blocked_time = 0.0
+        self.samples = latency_samples()
+
+    def percentile(self, p):
+        return percentile(self.samples, p)
+
+    def summary(self):
+        return (
+            f"{self.submitted} cmds queued, {self.written} written in {self.writes} writes | "
+            f"coalesced {self.coalesced}, dropped {self.dropped}, replayed {self.replayed}, "
+            f"expired {self.expired}, stale decisions {self.stale_decisions} | max depth {self.max_depth}, "
+            f"Tk blocked {self.blocked_time * 1000:.1f} ms | queue->UART p50 {self.percentile(0.5) * 1000:.2f} ms, "
+            f"p99 {self.percentile(0.99) * 1000:.2f} ms"
+        )
+
+
+class SerialWriter:
+    """
+    port     : objek serial.Serial yang sudah terbuka (None = antri dulu, attach() nanti)
+    encode   : perintah teks -> bytes (protokol teks / biner)
+    on_error : dipanggil (di thread writer) kalau write gagal; antrian disimpan untuk attach()
+    decision_max_age : batas umur test_pass / test_fail yang masih di-replay (waktu transit belt)
+    """
+
+    def __init__(self, port, encode, max_queue=WRITE_QUEUE_SIZE, on_error=None,
+                 decision_max_age=DECISION_REPLAY_MAX_AGE):
+        self.port = port
+        self.encode = encode
+        self.max_queue = max_queue
+        self.on_error = on_error
+        self.decision_max_age = decision_max_age
+        self.stats = WriterStats()
+
+        # (cmd, bytes ter-encode, waktu masuk antrian)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._detached = False
+        self._thread = None
+
+    @property
+    def depth(self):
+        return len(self._queue)
+
+    def start(self):
+        if self._thread or self.port is None:
+            return
+        self._closing = False
+        self._detached = False
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def attach(self, port):
+        """Pakai port baru (reconnect); perintah yang antri selama putus ikut dikirim"""
+        self.detach()
+        with self._cond:
+            self.port = port
+            self._drop_expired()
+            self.stats.replayed += len(self._queue)
+        self.start()
+
+    def detach(self):
+        """Stop thread writer tanpa membuang antrian (port putus / diganti)"""
+        if not self._thread:
+            return
+        with self._cond:
+            self._detached = True
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def send(self, cmd):
+        """Masukkan perintah ke antrian (dipanggil dari Tk thread). Return False kalau dibuang."""
+        stats = self.stats
+        # Encode di sini, bukan di thread writer: perintah yang tidak bisa
+        # di-encode (payload frame > 255 byte) ditolak tanpa mematikan writer
+        try:
+            data = self.encode(cmd)
+        except ValueError as e:
+            stats.dropped += 1
+            print(f"❌ Serial command '{cmd}' rejected: {e}")
+            return False
+
+        with self._cond:
+            if self._closing:
+                return False
+            if cmd in COALESCE_COMMANDS and any(entry[0] == cmd for entry in self._queue):
+                stats.coalesced += 1
+                return True
+
+            if len(self._queue) >= self.max_queue:
+                self._drop_coalescable()
+            writing = self._thread is not None and not self._detached
+            if len(self._queue) >= self.max_queue and not writing:
+                # Port putus / belum terbuka: tidak ada writer yang mengosongkan antrian
+                self._drop_expired()
+            if len(self._queue) >= self.max_queue and writing:
+                start = time.perf_counter()
+                self._cond.wait_for(lambda: len(self._queue) < self.max_queue, WRITE_FULL_TIMEOUT)
+                stats.blocked_time += time.perf_counter() - start
+            if len(self._queue) >= self.max_queue:
+                stats.dropped += 1
+                print(f"❌ Serial write queue full, dropped '{cmd}'")
+                return False
+
+            self._queue.append((cmd, data, time.perf_counter()))
+            stats.submitted += 1
+            stats.max_depth = max(stats.max_depth, len(self._queue))
+            self._cond.notify_all()
+        return True
+
+    def _drop_coalescable(self):
+        """Antrian penuh: poll status yang belum terkirim boleh dibuang duluan"""
+        kept = deque(entry for entry in self._queue if entry[0] not in COALESCE_COMMANDS)
+        self.stats.coalesced += len(self._queue) - len(kept)
+        self._queue = kept
+
+    def _drop_expired(self):
+        now = time.perf_counter()
+        limit = now - REPLAY_MAX_AGE
+        decision_limit = now - self.decision_max_age
+        kept = deque()
+        stale = []
+        expired = 0
+        for entry in self._queue:
+            if entry[0] in DECISION_COMMANDS:
+                if entry[2] >= decision_limit:
+                    kept.append(entry)
+                else:
+                    # Item sudah lewat diverter: menggerakkan diverter sekarang kena item lain
+                    stale.append(entry[0])
+            elif entry[2] >= limit:
+                kept.append(entry)
+            else:
+                expired += 1
+        if expired:
+            self.stats.expired += expired
+            print(f"⚠ {expired} serial commands older than {REPLAY_MAX_AGE:.0f}s not replayed")
+        if stale:
+            self.stats.stale_decisions += len(stale)
+            print(f"⚠ {len(stale)} diverter decisions older than {self.decision_max_age:.1f}s not replayed "
+                  f"({stale.count('test_pass')} pass, {stale.count('test_fail')} fail)")
+        self._queue = kept
+
+    def close(self, timeout=1.0):
+        """Kirim sisa antrian lalu stop thread writer"""
+        if not self._thread:
+            return
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _write_loop(self):
+        stats = self.stats
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closing or self._detached)
+                if self._detached or not self._queue:
+                    return
+                batch, self._queue = self._queue, deque()
+                self._cond.notify_all()
+
+            # Semua perintah yang sudah antri dikirim dalam satu write, urutan tetap
+            data = b"".join(entry[1] for entry in batch)
+            try:
+                self.port.write(data)
+            except Exception as e:
+                # Port putus sebelum byte diterima driver: batch ini dikirim ulang setelah attach()
+                with self._cond:
+                    self._queue.extendleft(reversed(batch))
+                self._fail(e)
+                return
+            try:
+                self.port.flush()
+            except Exception as e:
+                # Byte sudah di buffer driver: tidak diulang, supaya diverter tidak bergerak dua kali
+                stats.written += len(batch)
+                self._fail(e)
+                return
+
+            done = time.perf_counter()
+            stats.writes += 1
+            stats.written += len(batch)
+            stats.samples.extend(done - entry[2] for entry in batch)
+
+    def _fail(self, error):
+        with self._cond:
+            self._detached = True
+        print(f"❌ Serial write error: {error}")
+        if self.on_error:
+            self.on_error(error)
+
+
+class ReconnectStats:
+    """Putus / reconnect dan downtime port serial (MTTR = downtime / reconnect)"""
+
+    def __init__(self):
+        self.disconnects = 0
+        self.reconnects = 0
+        self.failed_attempts = 0
+        self.downtime = 0.0
+        self.max_downtime = 0.0
+
+    def summary(self):
+        mttr = self.downtime / self.reconnects if self.reconnects else 0.0
+        return (
+            f"{self.disconnects} disconnects, {self.reconnects} reconnects "
+            f"({self.failed_attempts} failed attempts) | downtime total {self.downtime:.1f}s, "
+            f"max {self.max_downtime:.1f}s, MTTR {mttr:.1f}s"
+        )
+
+
+class SerialSupervisor:
+    """
+    find_port : () -> nama port Arduino atau None (scan list_ports setiap RESCAN_INTERVAL)
+    connect   : (port_name) -> True kalau port terbuka; dipanggil di thread supervisor.
+                Setelah port dipakai pemanggil harus memanggil connected().
+    """
+
+    def __init__(self, find_port, connect, base_delay=RECONNECT_BASE_DELAY, max_delay=RECONNECT_MAX_DELAY):
+        self.find_port = find_port
+        self.connect = connect
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = ReconnectStats()
+
+        self._lock = threading.Lock()
+        # Set = belum / tidak terhubung, supervisor perlu connect
+        self._lost = threading.Event()
+        self._lost.set()
+        # monotonic saat port putus; None = terhubung atau belum pernah terhubung
+        self._down_since = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def reconnecting(self):
+        return self._down_since is not None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._lost.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def disconnected(self):
+        """Dipanggil saat read / write gagal (port putus)"""
+        with self._lock:
+            if self._lost.is_set():
+                return
+            self._down_since = time.monotonic()
+            self.stats.disconnects += 1
+            self._lost.set()
+
+    def _run(self):
+        attempt = 0
+        scanned = False
+        while not self._stop.is_set():
+            self._lost.wait()
+            if self._stop.is_set():
+                return
+
+            with self._lock:
+                down_since = self._down_since
+                self._lost.clear()
+            port_name = self.find_port()
+            if port_name and self.connect(port_name):
+                attempt = 0
+                scanned = False
+                if down_since is not None:
+                    self._record_reconnect(port_name, down_since)
+                continue
+
+            with self._lock:
+                self._lost.set()
+            if not port_name:
+                # Adapter belum dicolok lagi: tunggu hot-plug, tanpa backoff
+                if not scanned:
+                    print("⚠ No Arduino found, rescanning serial ports")
+                    scanned = True
+                self._stop.wait(RESCAN_INTERVAL)
+                continue
+
+            if down_since is not None:
+                self.stats.failed_attempts += 1
+            delay = min(self.max_delay, self.base_delay * 2 ** min(attempt, 10))
+            attempt += 1
+            self._stop.wait(delay)
+
+    def connected(self):
+        """
+        Dipanggil setelah port baru dipakai (mis. di Tk thread setelah
+        self.arduino di-set). Baru di sini status reconnecting selesai, jadi
+        perintah di jendela antara connect dan port dipublikasikan tetap antri.
+        """
+        with self._lock:
+            # Sudah putus lagi sebelum port dipakai: supervisor masih reconnect
+            if not self._lost.is_set():
+                self._down_since = None
+
+    def _record_reconnect(self, port_name, down_since):
+        downtime = time.monotonic() - down_since
+        stats = self.stats
+        stats.reconnects += 1
+        stats.downtime += downtime
+        stats.max_downtime = max(stats.max_downtime, downtime)
+        print(f"🔌 Arduino reconnected on {port_name} after {downtime:.1f}s down")
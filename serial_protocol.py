@@ -0,0 +1,192 @@
+"""
+Protokol link Arduino: teks (default) atau frame biner dengan CRC.
+
+Teks: satu perintah per baris, mis. "SCAN2:12345:BCA1000000000000000000001\\n".
+
+Biner (opsional, firmware harus mendukung):
+
+    0xA5 | type (1) | length (1) | payload (length byte) | CRC-16/CCITT-FALSE (2, big-endian)
+
+CRC dihitung atas type + length + payload. Type:
+
+    0x01  TEXT           payload = perintah / baris teks biasa
+    0x11  SCAN1 .. 0x13  payload = item_id (uint32 LE) | encoding (1) | kode
+    0x21  RESULT PASS    payload = item_id (uint32 LE)
+    0x22  RESULT FAIL    payload = item_id (uint32 LE)
+
+Kode scanner yang hanya angka (atau "BCA" + angka) dikirim sebagai BCD, dua
+digit per byte, jadi SCAN2 dengan kode 24 karakter turun dari 38 byte jadi
+21 byte di kabel. Decoder biner tetap menerima baris teks biasa di antara
+frame (log / firmware lama), dan semua frame diterjemahkan ke baris teks
+yang sama dengan protokol teks, jadi _handle_serial_line tidak berubah.
+"""
+
+import binascii
+import struct
+
+from serial_engine import MAX_LINE_LENGTH, LineFramer
+
+SOF = 0xA5
+
+TYPE_TEXT = 0x01
+TYPE_SCAN = {1: 0x11, 2: 0x12, 3: 0x13}
+TYPE_RESULT_PASS = 0x21
+TYPE_RESULT_FAIL = 0x22
+
+CODE_ASCII = 0
+CODE_BCD = 1
+CODE_BCA_BCD = 2
+
+_SCANNER_OF_TYPE = {t: n for n, t in TYPE_SCAN.items()}
+_RESULT_OF_TYPE = {TYPE_RESULT_PASS: "PASS", TYPE_RESULT_FAIL: "FAIL"}
+_HEADER = 3
+_CRC = 2
+_ITEM_ID = struct.Struct("<I")
+
+
+def crc16(data: bytes) -> int:
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), sama dengan crc16_ccitt di firmware"""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def _pack_bcd(digits: str) -> bytes:
+    if len(digits) % 2:
+        digits += "F"
+    return bytes.fromhex(digits)
+
+
+def _unpack_bcd(data: bytes) -> str:
+    return data.hex().upper().rstrip("F")
+
+
+def encode_code(code: str) -> bytes:
+    """Kode scanner -> encoding byte + data (BCD kalau bisa)"""
+    if not code.isascii():
+        return bytes([CODE_ASCII]) + code.encode("ascii", errors="replace")
+    if code.isdigit():
+        return bytes([CODE_BCD]) + _pack_bcd(code)
+    if code.startswith("BCA") and code[3:].isdigit():
+        return bytes([CODE_BCA_BCD]) + _pack_bcd(code[3:])
+    return bytes([CODE_ASCII]) + code.encode("ascii", errors="replace")
+
+
+def decode_code(data: bytes) -> str:
+    encoding, body = data[0], data[1:]
+    if encoding == CODE_BCD:
+        return _unpack_bcd(body)
+    if encoding == CODE_BCA_BCD:
+        return "BCA" + _unpack_bcd(body)
+    return body.decode("ascii", errors="replace")
+
+
+def encode_frame(frame_type: int, payload: bytes) -> bytes:
+    if len(payload) > 255:
+        raise ValueError(f"frame payload too long ({len(payload)} bytes)")
+    body = bytes([frame_type, len(payload)]) + payload
+    return bytes([SOF]) + body + crc16(body).to_bytes(2, "big")
+
+
+class TextProtocol:
+    name = "text"
+
+    def encode(self, cmd: str) -> bytes:
+        return (cmd + "\n").encode("utf-8")
+
+    def decoder(self):
+        return LineFramer()
+
+
+class BinaryProtocol:
+    name = "binary"
+
+    def encode(self, cmd: str) -> bytes:
+        """Perintah teks yang sama dengan _send_cmd -> frame biner"""
+        if cmd.startswith("SCAN") and cmd[4:5] in ("1", "2", "3"):
+            parts = cmd.split(":", 2)
+            if len(parts) == 3 and parts[1].isdigit():
+                payload = _ITEM_ID.pack(int(parts[1]) & 0xFFFFFFFF) + encode_code(parts[2])
+                return encode_frame(TYPE_SCAN[int(cmd[4])], payload)
+        return encode_frame(TYPE_TEXT, cmd.encode("utf-8"))
+
+    def decoder(self):
+        return FrameDecoder()
+
+
+class FrameDecoder:
+    """
+    Decoder stream biner dengan interface LineFramer (feed -> list baris).
+    Frame dengan CRC salah dibuang dan decoder mencari SOF berikutnya.
+    """
+
+    def __init__(self, max_line_length=MAX_LINE_LENGTH):
+        self._buffer = bytearray()
+        self._text = LineFramer(max_line_length)
+        self.frames = 0
+        self.crc_errors = 0
+        self.noise_lines = 0
+
+    @property
+    def dropped(self):
+        return self._text.dropped + self.crc_errors + self.noise_lines
+
+    def feed(self, data: bytes):
+        buf = self._buffer
+        buf += data
+        lines = []
+
+        while buf:
+            sof = buf.find(SOF)
+            if sof != 0:
+                # Byte di luar frame = teks biasa (log / fallback)
+                text = buf if sof < 0 else buf[:sof]
+                for line in self._text.feed(bytes(text)):
+                    # Sisa frame rusak yang terbaca sebagai teks
+                    if line.isprintable():
+                        lines.append(line)
+                    else:
+                        self.noise_lines += 1
+                del buf[:len(text)]
+                continue
+
+            if len(buf) < _HEADER:
+                break
+            end = _HEADER + buf[2] + _CRC
+            if len(buf) < end:
+                break
+
+            body = bytes(buf[1:end - _CRC])
+            if crc16(body) != int.from_bytes(buf[end - _CRC:end], "big"):
+                # Bukan frame valid: buang SOF ini, cari SOF berikutnya
+                self.crc_errors += 1
+                del buf[0]
+                continue
+
+            del buf[:end]
+            self.frames += 1
+            line = self._frame_to_line(body[0], body[2:])
+            if line:
+                lines.append(line)
+
+        return lines
+
+    @staticmethod
+    def _frame_to_line(frame_type, payload):
+        if frame_type == TYPE_TEXT:
+            return payload.decode("utf-8", errors="ignore").strip()
+        if frame_type in _RESULT_OF_TYPE and len(payload) == 4:
+            return f"RESULT:{_RESULT_OF_TYPE[frame_type]}:{_ITEM_ID.unpack(payload)[0]}"
+        if frame_type in _SCANNER_OF_TYPE and len(payload) > 4:
+            item_id = _ITEM_ID.unpack(payload[:4])[0]
+            return f"SCAN{_SCANNER_OF_TYPE[frame_type]}:{item_id}:{decode_code(payload[4:])}"
+        return None
+
+
+PROTOCOLS = {"text": TextProtocol, "binary": BinaryProtocol}
+
+
+def make_protocol(name):
+    try:
+        return PROTOCOLS[name]()
+    except KeyError:
+        print(f"⚠ Unknown serial protocol '{name}', using text")
+        return TextProtocol()
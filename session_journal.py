@@ -0,0 +1,298 @@
+"""
+Journal append-only (satu JSON per baris) untuk item yang sudah di-commit.
+
+Setiap batch punya satu file journal:
+
+    {"type": "start", "batch_record_id": ..., "started_at": ...}
+    {"type": "item", "timestamp": ..., "entry": {<entry payload finish>}}
+    ...
+    {"type": "uploaded", "offset": ...}     (progress upload finish bertahap)
+    {"type": "stop", "stopped_at": ...}     (STOP ditekan, menunggu finish)
+    {"type": "finish", "finished_at": ...}
+
+Item ditulis ke buffer file di Tk thread (murah), lalu thread flusher
+melakukan flush + fsync secara batch setiap FSYNC_INTERVAL detik. Saat crash
+paling banyak item dalam satu interval yang hilang. Payload
+/batch/{id}/finish di-stream langsung dari file, tidak perlu list di RAM.
+"""
+
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+
+FSYNC_INTERVAL = 0.5
+
+
+class SessionJournal:
+    def __init__(self, path, fsync_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_interval = fsync_interval
+
+        self.batch_record_id = None
+        self.started_at = None
+        self.count = 0
+        # item_id item terakhir yang di-append (lanjutan ItemIdSequence setelah recovery)
+        self.last_item_id = 0
+        self.uploaded = 0
+        self.stopped = False
+        self.finished = False
+
+        self._file = None
+        # (index item berikutnya, byte offset-nya) supaya iter_items(start) tidak scan dari awal
+        self._resume_point = (0, 0)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._flusher = None
+
+    # ---------- writing ----------
+
+    def start(self, batch_record_id, started_at):
+        """Mulai journal batch baru (journal lama yang belum terkirim disimpan)"""
+        self.close()
+        self._rotate_unsent()
+
+        self.batch_record_id = batch_record_id
+        self.started_at = started_at
+        self.count = 0
+        self.last_item_id = 0
+        self.uploaded = 0
+        self.stopped = False
+        self.finished = False
+        self._resume_point = (0, 0)
+
+        self._open("w")
+        self._write({"type": "start", "batch_record_id": batch_record_id, "started_at": started_at})
+        self.sync()
+
+    def append(self, item):
+        """Append ItemRecord / SessionEntry yang sudah di-commit"""
+        self._write({"type": "item", "timestamp": item.timestamp, "entry": item.to_finish_entry()})
+        self.count += 1
+        self.last_item_id = item.item_id
+
+    def mark_uploaded(self, offset):
+        """Simpan (durable) jumlah item yang sudah diterima backend"""
+        self._write({"type": "uploaded", "offset": offset})
+        self.uploaded = offset
+        self.sync()
+
+    def mark_stopped(self):
+        """STOP ditekan: batch tidak di-recover sebagai batch aktif lagi, tinggal di-finish"""
+        self._write({"type": "stop", "stopped_at": datetime.now().isoformat()})
+        self.stopped = True
+        self.sync()
+
+    def park(self):
+        """
+        Pindahkan journal batch yang belum finish ke .unsent-<id> supaya batch
+        baru bisa dimulai; return journal ini (tetap bisa di-append / finish).
+        """
+        self.close()
+        unsent = self._unsent_path(self.batch_record_id)
+        os.replace(self.path, unsent)
+        self.path = unsent
+        self._open("a")
+        return self
+
+    def finish(self):
+        """Tandai batch sudah berhasil dikirim ke backend"""
+        self._write({"type": "finish", "finished_at": datetime.now().isoformat()})
+        self.finished = True
+        self.sync()
+        self.close()
+
+    def sync(self):
+        """flush + fsync sekarang juga"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            self._dirty = False
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._flusher:
+            self._stop.set()
+            self._flusher.join(timeout=1)
+            self._flusher = None
+
+        if self._file:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _open(self, mode):
+        self._file = open(self.path, mode, encoding="utf-8")
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._dirty = True
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            with self._lock:
+                if not self._dirty or self._file is None:
+                    continue
+                # flush di dalam lock (cepat), fsync di luar supaya append tidak ikut blok
+                self._file.flush()
+                self._dirty = False
+                fd = self._file.fileno()
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                print(f"❌ Session journal fsync error: {e}")
+
+    def _rotate_unsent(self):
+        """Journal batch sebelumnya yang belum finish jangan ditimpa"""
+        if not os.path.exists(self.path) or self.finished:
+            return
+
+        previous = SessionJournal(self.path)
+        previous._scan()
+        if previous.batch_record_id is not None and not previous.finished:
+            unsent = self._unsent_path(previous.batch_record_id)
+            os.replace(self.path, unsent)
+            print(f"⚠ Unsent session journal kept: {unsent}")
+
+    def _unsent_path(self, batch_record_id):
+        return f"{self.path}.unsent-{batch_record_id}"
+
+    # ---------- reading ----------
+
+    def _records(self, offset=0):
+        """Yield (offset akhir baris, record) sampai baris rusak pertama"""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return
+                offset += len(line)
+                yield offset, record
+
+    def _scan(self):
+        """Baca ulang state dari file, return offset akhir baris valid terakhir"""
+        self.batch_record_id = None
+        self.started_at = None
+        self.count = 0
+        self.last_item_id = 0
+        self.uploaded = 0
+        self.stopped = False
+        self.finished = False
+
+        end = 0
+        for end, record in self._records():
+            kind = record.get("type")
+            if kind == "start":
+                self.batch_record_id = record.get("batch_record_id")
+                self.started_at = record.get("started_at")
+            elif kind == "item":
+                self.count += 1
+                self.last_item_id = record["entry"].get("item_id")
+            elif kind == "uploaded":
+                self.uploaded = record.get("offset", 0)
+            elif kind == "stop":
+                self.stopped = True
+            elif kind == "finish":
+                self.finished = True
+        return end
+
+    def iter_items(self, start=0):
+        """Yield (timestamp, finish entry) untuk setiap item di journal, mulai item ke-start"""
+        if self._file:
+            self.sync()
+        index, offset = self._resume_point
+        if index > start:
+            index, offset = 0, 0
+        for end, record in self._records(offset):
+            if record.get("type") == "item":
+                index += 1
+                if index > start:
+                    self._resume_point = (index, end)
+                    yield record.get("timestamp"), record["entry"]
+
+    def iter_entry_json(self, start=0):
+        """Seperti iter_items tapi yield teks JSON entry"""
+        for _, entry in self.iter_items(start):
+            yield json.dumps(entry, separators=(",", ":"))
+
+    def result_counts(self):
+        """{"Pass": n, "Fail": n, ...} untuk batch ini"""
+        counts = {}
+        for _, entry in self.iter_items():
+            counts[entry.get("result")] = counts.get(entry.get("result"), 0) + 1
+        return counts
+
+    def iter_finish_payload(self):
+        """Body JSON array untuk POST /batch/{id}/finish, di-stream per item"""
+        yield b"["
+        first = True
+        for _, entry in self.iter_items():
+            chunk = json.dumps(entry).encode("utf-8")
+            yield chunk if first else b"," + chunk
+            first = False
+        yield b"]"
+
+    # ---------- recovery ----------
+
+    @classmethod
+    def recover(cls, path, fsync_interval=FSYNC_INTERVAL):
+        """
+        Buka journal yang ada setelah crash / restart. Baris terakhir yang
+        terpotong dibuang. Return journal yang siap di-append kalau batch
+        belum finish dan belum di-STOP, selain itu None.
+        """
+        if not os.path.exists(path):
+            return None
+
+        journal = cls(path, fsync_interval)
+        journal._scan()
+        if journal.stopped:
+            return None
+        return cls._reopen(path, fsync_interval)
+
+    @classmethod
+    def pending_finish(cls, path, fsync_interval=FSYNC_INTERVAL):
+        """
+        Journal batch yang belum finish di backend: batch yang sudah di-STOP
+        (dipindah ke .unsent-<id>) dan semua .unsent-<id> yang belum finish.
+        """
+        pending = []
+        for unsent in sorted(glob.glob(glob.escape(path) + ".unsent-*")):
+            journal = cls._reopen(unsent, fsync_interval)
+            if journal:
+                pending.append(journal)
+
+        if os.path.exists(path):
+            probe = cls(path, fsync_interval)
+            probe._scan()
+            if probe.stopped and not probe.finished:
+                pending.append(cls._reopen(path, fsync_interval).park())
+        return pending
+
+    @classmethod
+    def _reopen(cls, path, fsync_interval):
+        """Buka journal batch yang belum finish untuk di-append, atau None"""
+        journal = cls(path, fsync_interval)
+        end = journal._scan()
+
+        if journal.batch_record_id is None or journal.finished:
+            return None
+
+        if end != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(end)
+
+        journal._open("a")
+        return journal
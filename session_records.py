@@ -0,0 +1,112 @@
+"""
+Record ringkas (__slots__) untuk item yang sedang discan dan isi session_data.
+
+Sebelumnya setiap item berupa dict bertingkat
+({"item_id", "timestamp", "scanner_1": {"value", "valid"}, ...}); di shift
+panjang itu jadi puluhan ribu dict kecil. Bentuk JSON yang dikirim ke
+/batch/{id}/finish tetap sama lewat to_finish_entry(), ditambah "row_match"
+kalau row check aktif.
+"""
+
+SCANNER_FIELDS = ("scanner_1", "scanner_2", "scanner_3")
+# Item ID dikirim sebagai uint32 di frame biner (teks SCANn:{id}:{code} tanpa
+# batas lebar), jadi baru kembali ke 1 setelah 2**32 - 1
+ITEM_ID_LIMIT = 2 ** 32
+
+
+class ScanResult:
+    __slots__ = ("value", "valid")
+
+    def __init__(self, value, valid=None):
+        self.value = value
+        self.valid = valid
+
+    def to_dict(self):
+        return {"value": self.value, "valid": self.valid}
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class ItemRecord:
+    __slots__ = ("item_id", "timestamp", "scanner_1", "scanner_2", "scanner_3", "validation_result",
+                 "row_match")
+
+    # Scanner yang belum discan tetap ikut sebagai null di payload finish
+    OMIT_UNSCANNED = False
+
+    def __init__(self, item_id, timestamp, scanner_1=None, scanner_2=None, scanner_3=None,
+                 validation_result=None, row_match=None):
+        self.item_id = item_id
+        self.timestamp = timestamp
+        self.scanner_1 = scanner_1
+        self.scanner_2 = scanner_2
+        self.scanner_3 = scanner_3
+        self.validation_result = validation_result
+        # Hasil row check (scanner 1/2/3 dari baris DB yang sama); None = tidak dicek
+        self.row_match = row_match
+
+    def scans(self):
+        """Yield (field, ScanResult atau None) untuk scanner 1/2/3"""
+        for field in SCANNER_FIELDS:
+            yield field, getattr(self, field)
+
+    def _scanner_dicts(self):
+        for field, scan in self.scans():
+            if scan is None:
+                if not self.OMIT_UNSCANNED:
+                    yield field, None
+            else:
+                yield field, scan.to_dict()
+
+    def to_dict(self):
+        """Bentuk dict lama current_item (untuk log / debug)"""
+        data = {"item_id": self.item_id, "timestamp": self.timestamp}
+        data.update(self._scanner_dicts())
+        if self.validation_result is not None:
+            data["validation_result"] = self.validation_result
+        if self.row_match is not None:
+            data["row_match"] = self.row_match
+        return data
+
+    def to_finish_entry(self):
+        """Satu entry payload POST /batch/{id}/finish"""
+        entry = {"item_id": self.item_id}
+        entry.update(self._scanner_dicts())
+
+        res = self.validation_result
+        if isinstance(res, str):
+            res = res.strip().capitalize()
+        entry["result"] = res or "Unknown"
+        # Hanya kalau row check aktif, supaya FAIL karena baris beda bisa
+        # dibedakan dari FAIL karena kode tidak ada di DB
+        if self.row_match is not None:
+            entry["row_match"] = self.row_match
+        return entry
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class SessionEntry(ItemRecord):
+    """Entry dari _add_to_session: hanya scanner yang discan yang ikut"""
+
+    __slots__ = ()
+    OMIT_UNSCANNED = True
+
+
+class ItemIdSequence:
+    """
+    Item ID per batch: 1, 2, 3, ... sampai ITEM_ID_LIMIT - 1 (batas uint32) lalu kembali ke 1.
+    Pengganti int(time.time() * 1000) % 100000 yang bisa sama untuk dua item
+    dalam satu batch. Setelah recovery lanjut dari item terakhir di session store.
+    """
+
+    __slots__ = ("last",)
+
+    def __init__(self, last=0):
+        self.last = last or 0
+
+    def next(self):
+        self.last = self.last % (ITEM_ID_LIMIT - 1) + 1
+        return self.last
@@ -0,0 +1,437 @@
+"""
+Session store berbasis SQLite (WAL) untuk item yang sudah di-commit.
+
+Alternatif dari SessionJournal dengan interface yang sama (start, append,
+finish, iter_items, iter_finish_payload, recover). Setiap batch punya tabel
+sendiri (batch_<batch_record_id>), satu baris per item, dengan index per
+kode scanner dan result supaya bisa query PASS/FAIL per batch dan cari item
+berdasarkan kode.
+
+Semua tulis dilakukan oleh satu writer thread: append() hanya memasukkan
+item ke queue, writer mengumpulkan sampai WRITE_BATCH_SIZE item atau
+WRITE_BATCH_INTERVAL detik lalu commit dalam satu transaksi. Tk thread
+tidak pernah menunggu disk. Transaksi yang gagal diulang, bukan dibuang.
+"""
+
+import json
+import queue
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+WRITE_BATCH_SIZE = 200
+WRITE_BATCH_INTERVAL = 0.2
+
+# Transaksi yang gagal (mis. "database is locked") diulang dengan backoff;
+# setelah close() writer menyerah setelah CLOSE_RETRIES kali
+WRITE_RETRY_DELAY = 0.05
+WRITE_RETRY_MAX_DELAY = 2.0
+CLOSE_RETRIES = 5
+# Batas tunggu close() di Tk thread; writer yang masih macet dibiarkan (daemon)
+CLOSE_TIMEOUT = 3.0
+
+_SCANNER_FIELDS = ("scanner_1", "scanner_2", "scanner_3")
+
+_CREATE_BATCHES = """
+CREATE TABLE IF NOT EXISTS batches (
+    batch_record_id TEXT PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    uploaded INTEGER NOT NULL DEFAULT 0,
+    stopped_at TEXT
+)
+"""
+
+_CREATE_ITEMS = """
+CREATE TABLE IF NOT EXISTS {table} (
+    seq INTEGER PRIMARY KEY,
+    item_id INTEGER,
+    timestamp TEXT,
+    scanner_1 TEXT,
+    scanner_1_valid INTEGER,
+    scanner_2 TEXT,
+    scanner_2_valid INTEGER,
+    scanner_3 TEXT,
+    scanner_3_valid INTEGER,
+    result TEXT,
+    entry TEXT NOT NULL
+)
+"""
+
+_ITEM_INDEXES = ("scanner_1", "scanner_2", "scanner_3", "result")
+
+_INSERT_ITEM = """
+INSERT INTO {table} (
+    item_id, timestamp, scanner_1, scanner_1_valid, scanner_2, scanner_2_valid,
+    scanner_3, scanner_3_valid, result, entry
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Sentinel di queue writer
+_STOP = object()
+
+
+def table_name(batch_record_id):
+    """batch_record_id -> nama tabel yang aman dipakai di SQL"""
+    return "batch_" + re.sub(r"[^0-9A-Za-z_]", "_", str(batch_record_id))
+
+
+# Kolom yang ditambahkan setelah versi pertama tabel batches
+_BATCH_COLUMNS_ADDED = (
+    ("uploaded", "INTEGER NOT NULL DEFAULT 0"),
+    ("stopped_at", "TEXT"),
+)
+
+_BATCH_SELECT = "SELECT batch_record_id, table_name, started_at, uploaded, stopped_at FROM batches "
+
+
+def _ensure_schema(conn):
+    conn.execute(_CREATE_BATCHES)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(batches)")}
+    for column, declaration in _BATCH_COLUMNS_ADDED:
+        if column not in columns:
+            conn.execute(f"ALTER TABLE batches ADD COLUMN {column} {declaration}")
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _item_row(timestamp, entry):
+    row = [entry.get("item_id"), timestamp]
+    for field in _SCANNER_FIELDS:
+        scan = entry.get(field)
+        row.append(scan["value"] if scan else None)
+        row.append(None if not scan or scan["valid"] is None else int(bool(scan["valid"])))
+    row.append(entry.get("result"))
+    row.append(json.dumps(entry, separators=(",", ":")))
+    return row
+
+
+class SqliteSessionStore:
+    def __init__(self, path, batch_size=WRITE_BATCH_SIZE, batch_interval=WRITE_BATCH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+
+        self.batch_record_id = None
+        self.started_at = None
+        self.count = 0
+        # item_id item terakhir yang di-append (lanjutan ItemIdSequence setelah recovery)
+        self.last_item_id = 0
+        self.uploaded = 0
+        self.stopped = False
+        self.finished = False
+
+        # Queue + event closing per writer thread, dibuat di _start_writer
+        self._queue = None
+        self._closing = None
+        self._writer = None
+        self.write_errors = 0
+
+        conn = _connect(path)
+        with conn:
+            _ensure_schema(conn)
+        conn.close()
+
+    @property
+    def table(self):
+        return table_name(self.batch_record_id)
+
+    # ---------- writing ----------
+
+    def start(self, batch_record_id, started_at):
+        """Mulai batch baru (tabel baru, batch lama tetap tersimpan)"""
+        self.close()
+
+        self.batch_record_id = batch_record_id
+        self.started_at = started_at
+        self.count = 0
+        self.last_item_id = 0
+        self.uploaded = 0
+        self.stopped = False
+        self.finished = False
+
+        self._start_writer()
+        self._submit(("start", batch_record_id, started_at))
+
+    def append(self, item):
+        """Append ItemRecord / SessionEntry yang sudah di-commit (non-blocking)"""
+        self._submit(("item", item.timestamp, item.to_finish_entry()))
+        self.count += 1
+        self.last_item_id = item.item_id
+
+    def mark_uploaded(self, offset):
+        """Simpan (durable) jumlah item yang sudah diterima backend"""
+        self._submit(("uploaded", offset))
+        self.uploaded = offset
+        self.sync()
+
+    def mark_stopped(self):
+        """STOP ditekan: batch tidak di-recover sebagai batch aktif lagi, tinggal di-finish"""
+        self._submit(("stopped", datetime.now().isoformat()))
+        self.stopped = True
+        self.sync()
+
+    def park(self):
+        """Batch lain bisa dimulai tanpa memindah apa-apa (tabel per batch)"""
+        return self
+
+    def finish(self):
+        """Tandai batch sudah berhasil dikirim ke backend"""
+        self._submit(("finish", datetime.now().isoformat()))
+        self.finished = True
+        self.close()
+
+    def sync(self):
+        """
+        Tunggu sampai semua item di queue sudah di-commit. Raise sqlite3.Error
+        kalau writer menyerah (store sedang ditutup) sebelum item tertulis.
+        """
+        if not self._writer:
+            return
+        done = threading.Event()
+        failed = []
+        self._queue.put(("sync", done, failed))
+        done.wait()
+        if failed:
+            raise failed[0]
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        if self._writer:
+            self._closing.set()
+            self._queue.put(_STOP)
+            self._writer.join(timeout)
+            if self._writer.is_alive():
+                print(f"⚠ Session store writer still busy after {timeout:.0f}s, not waiting")
+            self._writer = None
+
+    def _submit(self, op):
+        if not self._writer:
+            raise RuntimeError("Session store not started")
+        self._queue.put(op)
+
+    def _start_writer(self):
+        # Queue baru per writer: writer lama yang belum selesai (close timeout)
+        # tidak ikut mengambil op batch berikutnya
+        self._queue = queue.Queue()
+        self._closing = threading.Event()
+        self._writer = threading.Thread(
+            target=self._write_loop, args=(self._queue, self._closing), daemon=True
+        )
+        self._writer.start()
+
+    def _write_loop(self, ops_queue, closing):
+        conn = _connect(self.path)
+        table = self.table
+        insert = _INSERT_ITEM.format(table=table)
+
+        try:
+            while True:
+                ops = [ops_queue.get()]
+                # Kumpulkan op berikutnya sampai batch penuh / interval habis
+                try:
+                    while len(ops) < self.batch_size and not self._is_barrier(ops[-1]):
+                        ops.append(ops_queue.get(timeout=self.batch_interval))
+                except queue.Empty:
+                    pass
+
+                error = self._apply_with_retry(conn, table, insert, ops, closing)
+
+                for op in ops:
+                    if op is _STOP:
+                        return
+                    if op[0] == "sync":
+                        if error is not None:
+                            op[2].append(error)
+                        op[1].set()
+        finally:
+            conn.close()
+
+    def _apply_with_retry(self, conn, table, insert, ops, closing):
+        """
+        Commit ops dalam satu transaksi, diulang dengan backoff sampai berhasil,
+        jadi sync waiter baru dilepas setelah datanya benar-benar tertulis.
+        Setelah close() writer menyerah (CLOSE_RETRIES kali) dan return error
+        terakhir; sync waiter di batch yang sama menerima error itu.
+        """
+        delay = WRITE_RETRY_DELAY
+        attempt = 0
+        while True:
+            try:
+                self._apply(conn, table, insert, ops)
+                return None
+            except sqlite3.Error as e:
+                self.write_errors += 1
+                attempt += 1
+                if closing.is_set() and attempt >= CLOSE_RETRIES:
+                    lost = sum(1 for op in ops if op is not _STOP and op[0] == "item")
+                    print(f"❌ Session store write failed, {lost} items not written: {e}")
+                    return e
+                print(f"❌ Session store write error (retry in {delay:.2f}s): {e}")
+                # close() memotong jeda backoff
+                closing.wait(delay)
+                delay = min(delay * 2, WRITE_RETRY_MAX_DELAY)
+
+    @staticmethod
+    def _is_barrier(op):
+        """sync / stop langsung di-commit tanpa menunggu batch penuh"""
+        return op is _STOP or op[0] == "sync"
+
+    def _apply(self, conn, table, insert, ops):
+        rows = []
+        with conn:
+            for op in ops:
+                if op is _STOP:
+                    continue
+                kind = op[0]
+                if kind == "item":
+                    rows.append(_item_row(op[1], op[2]))
+                elif kind == "start":
+                    conn.execute(_CREATE_ITEMS.format(table=table))
+                    for column in _ITEM_INDEXES:
+                        conn.execute(
+                            f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})"
+                        )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO batches (batch_record_id, table_name, started_at) "
+                        "VALUES (?, ?, ?)",
+                        (str(op[1]), table, op[2]),
+                    )
+                elif kind == "stopped":
+                    conn.execute("UPDATE batches SET stopped_at = ? WHERE table_name = ?", (op[1], table))
+                elif kind == "uploaded":
+                    conn.execute("UPDATE batches SET uploaded = ? WHERE table_name = ?", (op[1], table))
+                elif kind == "finish":
+                    if rows:
+                        conn.executemany(insert, rows)
+                        rows = []
+                    conn.execute(
+                        "UPDATE batches SET finished_at = ? WHERE table_name = ?",
+                        (op[1], table),
+                    )
+            if rows:
+                conn.executemany(insert, rows)
+
+    # ---------- reading ----------
+
+    def _read(self, sql, params=()):
+        self.sync()
+        conn = _connect(self.path)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _iter_rows(self, start):
+        self.sync()
+        conn = _connect(self.path)
+        try:
+            # seq berurutan dari 1 (tabel per batch, tidak pernah ada delete)
+            yield from conn.execute(
+                f"SELECT timestamp, entry FROM {self.table} WHERE seq > ? ORDER BY seq", (start,)
+            )
+        finally:
+            conn.close()
+
+    def iter_items(self, start=0):
+        """Yield (timestamp, finish entry) urut sesuai commit, mulai item ke-start"""
+        for timestamp, entry in self._iter_rows(start):
+            yield timestamp, json.loads(entry)
+
+    def iter_entry_json(self, start=0):
+        """Seperti iter_items tapi yield teks JSON entry apa adanya (tanpa parse ulang)"""
+        for _, entry in self._iter_rows(start):
+            yield entry
+
+    def iter_finish_payload(self):
+        """Body JSON array untuk POST /batch/{id}/finish, di-stream per item"""
+        yield b"["
+        first = True
+        for entry in self.iter_entry_json():
+            chunk = entry.encode("utf-8")
+            yield chunk if first else b"," + chunk
+            first = False
+        yield b"]"
+
+    def result_counts(self):
+        """{"Pass": n, "Fail": n, ...} untuk batch ini"""
+        return dict(self._read(f"SELECT result, COUNT(*) FROM {self.table} GROUP BY result"))
+
+    def find_by_code(self, code):
+        """Semua item di batch ini yang punya kode ini di scanner mana pun"""
+        rows = self._read(
+            f"SELECT timestamp, entry FROM {self.table} "
+            f"WHERE scanner_1 = ? OR scanner_2 = ? OR scanner_3 = ? ORDER BY seq",
+            (code, code, code),
+        )
+        return [(timestamp, json.loads(entry)) for timestamp, entry in rows]
+
+    # ---------- recovery ----------
+
+    @classmethod
+    def recover(cls, path, **kwargs):
+        """
+        Return store untuk batch terakhir yang belum finish dan belum di-STOP
+        (siap di-append), atau None kalau tidak ada.
+        """
+        conn = _connect(path)
+        try:
+            with conn:
+                _ensure_schema(conn)
+            row = conn.execute(
+                _BATCH_SELECT + "WHERE finished_at IS NULL AND stopped_at IS NULL ORDER BY rowid DESC LIMIT 1"
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+        return cls._open_batch(path, row, **kwargs)
+
+    @classmethod
+    def pending_finish(cls, path, **kwargs):
+        """
+        Store untuk batch yang belum finish di backend: sudah di-STOP, atau
+        batch lama yang tertinggal karena batch baru sudah dimulai.
+        """
+        conn = _connect(path)
+        try:
+            with conn:
+                _ensure_schema(conn)
+            rows = conn.execute(
+                _BATCH_SELECT + "WHERE finished_at IS NULL AND (stopped_at IS NOT NULL OR rowid < "
+                "(SELECT MAX(rowid) FROM batches WHERE finished_at IS NULL AND stopped_at IS NULL)) "
+                "ORDER BY rowid"
+            ).fetchall()
+        finally:
+            conn.close()
+        return [cls._open_batch(path, row, **kwargs) for row in rows]
+
+    @classmethod
+    def _open_batch(cls, path, row, **kwargs):
+        conn = _connect(path)
+        try:
+            count = conn.execute(f"SELECT COUNT(*) FROM {row[1]}").fetchone()[0]
+            last = conn.execute(f"SELECT item_id FROM {row[1]} ORDER BY seq DESC LIMIT 1").fetchone()
+        finally:
+            conn.close()
+
+        batch_record_id = row[0]
+        if batch_record_id.isdigit():
+            batch_record_id = int(batch_record_id)
+
+        store = cls(path, **kwargs)
+        store.batch_record_id = batch_record_id
+        store.started_at = row[2]
+        store.count = count
+        store.last_item_id = last[0] if last else 0
+        store.uploaded = row[3]
+        store.stopped = row[4] is not None
+        store._start_writer()
+        return store